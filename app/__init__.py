@@ -8,7 +8,9 @@ from config import config
 from app.extensions import db, migrate, login_manager
 from app.models import Admin
 from app.auth import auth_bp
-from app.routes import main_bp, person_bp, face_bp
+from app.routes import main_bp, person_bp, face_bp, export_bp
+from app.encoder import encoder
+from app.cli import register_commands
 
 
 def create_app(config_name='default'):
@@ -20,6 +22,7 @@ def create_app(config_name='default'):
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
+    encoder.init_app(app)
 
     # User loader for Flask-Login
     @login_manager.user_loader
@@ -31,6 +34,8 @@ def create_app(config_name='default'):
     app.register_blueprint(main_bp)
     app.register_blueprint(person_bp)
     app.register_blueprint(face_bp)
+    app.register_blueprint(export_bp)
+    register_commands(app)
 
     # Create database tables and default admin user
     with app.app_context():
@@ -44,5 +49,10 @@ def create_app(config_name='default'):
             db.session.commit()
             print("Default admin created.")
 
+    # Encode uploaded person images in the background, from the first request
+    # on, so flask CLI commands (e.g. db upgrade) never start the worker
+    if app.config.get('ENCODE_ON_UPLOAD', True):
+        app.before_request(encoder.start_once)
+
     return app
 
@@ -0,0 +1,163 @@
+"""
+Content-addressed storage of image files.
+
+Every image is stored once on disk, named by the SHA-256 hash of its bytes
+(BLOB_DIR/ab/cd/abcd...), exactly as uploaded. PersonImage and CapturedFace
+rows hold the hash, size and dimensions; rows with identical images share
+one file. The image_data column only holds images written before the store
+existed, until ``flask migrate-blobs`` moves them out.
+
+Stored files must never be modified in place: the dataset/ folder hard
+links them. Storing bytes that are already stored sets the access time of
+the file, and files stored or reused recently are not deleted, so a row
+being committed for an existing file never loses it to release_blobs().
+"""
+import hashlib
+import io
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from PIL import Image
+
+from app.extensions import db
+
+StoredImage = namedtuple('StoredImage', 'digest size width height format')
+
+
+class BlobStore:
+    """Files under ``root`` named by the SHA-256 hash of their content."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """Store ``data`` unless the same bytes are already stored; return its StoredImage.
+
+        Only the image header is read for the dimensions. Raises
+        PIL.UnidentifiedImageError if ``data`` is not an image.
+        """
+        img = Image.open(io.BytesIO(data))
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        try:
+            # Mark the file as in use; the modification time stays, dataset/ links share it
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return StoredImage(digest, len(data), img.width, img.height, img.format)
+
+    def read(self, digest):
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+    def link(self, digest, dest):
+        """Make ``dest`` a hard link to a stored file (a copy across file systems)."""
+        tmp = f'{dest}.{os.getpid()}.tmp'
+        try:
+            os.link(self.path(digest), tmp)
+        except OSError:
+            shutil.copyfile(self.path(digest), tmp)
+        os.replace(tmp, dest)
+
+    def delete(self, digest, min_age=0):
+        """Remove a stored file unless it was stored or reused less than ``min_age`` seconds ago.
+
+        Returns False if it did not exist or was kept. Only a file old
+        enough to remove is moved aside, and its age is checked again
+        there, so a concurrent put() of the same bytes either marks it in
+        time to keep it or writes it again.
+        """
+        path = self.path(digest)
+        try:
+            if min_age and time.time() - os.stat(path).st_atime < min_age:
+                return False
+            aside = f'{path}.{os.getpid()}.{threading.get_ident()}.del'
+            os.rename(path, aside)
+        except FileNotFoundError:
+            return False
+        if min_age and time.time() - os.stat(aside).st_atime < min_age:
+            os.replace(aside, path)  # Reused since the first check
+            return False
+        os.remove(aside)
+        return True
+
+
+def write_file(path, data):
+    """Write ``data`` to ``path`` through a new file, never into the existing one.
+
+    A file in dataset/ may be a hard link to a stored image; writing to it
+    in place would change the image of every row sharing it.
+    """
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def blob_store():
+    """The application's BlobStore, in BLOB_DIR."""
+    return BlobStore(current_app.config.get('BLOB_DIR', 'blobs'))
+
+
+def set_image(row, data, store=None):
+    """Store ``data`` and point ``row`` (a PersonImage or CapturedFace) at it."""
+    stored = (store or blob_store()).put(data)
+    row.image_hash = stored.digest
+    row.image_size = stored.size
+    row.width = stored.width
+    row.height = stored.height
+    row.image_format = stored.format
+    row.image_data = None
+    return stored
+
+
+def copy_image(source, row):
+    """Point ``row`` at the stored image of ``source``, sharing the file."""
+    row.image_hash = source.image_hash
+    row.image_size = source.image_size
+    row.width = source.width
+    row.height = source.height
+    row.image_format = source.image_format
+
+
+def image_bytes(row):
+    """Return the image of ``row`` from the store, or from image_data if not moved yet."""
+    if row.image_hash:
+        return blob_store().read(row.image_hash)
+    return row.image_data
+
+
+def release_blobs(digests):
+    """Delete the stored files of ``digests`` that no row references any more.
+
+    Call after committing the deletion of the rows. Files stored or reused
+    less than BLOB_RELEASE_MIN_AGE seconds ago are kept, as a row for them
+    may not be committed yet; ``flask prune-blobs`` removes them later.
+    Returns the number of files removed.
+    """
+    from app.models import PersonImage, CapturedFace
+
+    digests = {digest for digest in digests if digest}
+    if not digests:
+        return 0
+    used = set()
+    for model in (PersonImage, CapturedFace):
+        used.update(digest for (digest,) in db.session.query(model.image_hash).filter(
+            model.image_hash.in_(digests)).distinct())
+    store = blob_store()
+    min_age = current_app.config.get('BLOB_RELEASE_MIN_AGE', 60)
+    return sum(store.delete(digest, min_age=min_age) for digest in digests - used)
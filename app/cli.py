@@ -0,0 +1,147 @@
+"""
+Flask CLI commands for the stored face encodings and images.
+"""
+import os
+
+import click
+from flask.cli import with_appcontext
+from PIL import UnidentifiedImageError
+from sqlalchemy.orm import undefer
+
+from app.blobstore import blob_store, set_image
+from app.encoder import encoder, decode_encodings
+from app.extensions import db
+from app.models import RecognizedPerson, PersonImage, CapturedFace, FaceEncoding
+
+
+@click.command('encode-images')
+@click.option('--all', 'encode_all', is_flag=True, help='re-encode every image, not only new ones')
+@with_appcontext
+def encode_images_command(encode_all):
+    """Encode person images that have no stored face encodings yet."""
+    query = db.session.query(PersonImage.id).order_by(PersonImage.id)
+    if not encode_all:
+        query = query.filter(PersonImage.faces.is_(None))
+    image_ids = [image_id for (image_id,) in query]
+    click.echo(f'Encoding {len(image_ids)} images with {encoder.detector}...')
+    faces = failed = 0
+    for image_id in image_ids:
+        try:
+            faces += encoder.encode(image_id, force=encode_all) or 0
+        except Exception as e:
+            failed += 1
+            click.echo(f'Failed to encode image {image_id}: {e}', err=True)
+    click.echo(f'{faces} faces stored, {failed} images failed')
+
+
+@click.command('export-gallery')
+@click.option('--output', default='exported.gallery', show_default=True,
+              help='gallery file to write; door_monitor.py reads ENCODINGS_FILE (encodings.gallery)')
+@click.option('--compact', is_flag=True, help='also store per-person prototypes for faster matching')
+@click.option('--max-medoids', default=3, show_default=True,
+              help='outlier medoids kept per person in addition to the centroid')
+@with_appcontext
+def export_gallery_command(output, compact, max_medoids):
+    """Write the gallery read by door_monitor.py from the stored encodings.
+
+    One query over the stored vectors; no image is decoded and the dataset
+    folder is not read. Names are the people's current names. Paths are
+    person_image/<id>, not dataset paths, so the default output is not the
+    file train_model.py --incremental merges into.
+    """
+    from recognition import Gallery, GalleryError, compact_gallery, load_gallery
+
+    rows = db.session.query(
+        FaceEncoding.encoding, RecognizedPerson.name, RecognizedPerson.id, FaceEncoding.image_id
+    ).join(PersonImage, FaceEncoding.image_id == PersonImage.id).join(
+        RecognizedPerson, PersonImage.person_id == RecognizedPerson.id
+    ).order_by(RecognizedPerson.id, FaceEncoding.id).all()
+    encodings = decode_encodings([row.encoding for row in rows])
+    names = [row.name for row in rows]
+
+    pending = db.session.query(PersonImage.id).filter(PersonImage.faces.is_(None)).count()
+    if pending:
+        click.echo(f'Warning: {pending} images are not encoded yet (run flask encode-images)', err=True)
+
+    # Carry the generation number that running monitors compare against
+    generation = 0
+    if os.path.exists(output):
+        try:
+            generation = load_gallery(output).generation
+        except GalleryError as e:
+            click.echo(f'Ignoring previous gallery: {e}', err=True)
+    compacted = {}
+    if compact and len(encodings):
+        compacted = compact_gallery(encodings, names, max_medoids=max_medoids)
+    gallery = Gallery(encodings, names, person_ids=[row.id for row in rows],
+                      paths=[f'person_image/{row.image_id}' for row in rows],
+                      generation=generation, **compacted)
+    gallery.save(output)
+    click.echo(f'{len(encodings)} encodings of {len(set(names))} people written to {output} '
+               f'(generation {gallery.generation})')
+
+
+@click.command('migrate-blobs')
+@click.option('--batch-size', default=100, show_default=True, help='rows moved per transaction')
+@with_appcontext
+def migrate_blobs_command(batch_size):
+    """Move images stored in the database tables into the blob store.
+
+    Rows are moved in batches committed once their files are written, so
+    the command can be interrupted and run again. On PostgreSQL, run
+    VACUUM FULL on person_image and captured_face afterwards to give the
+    space back to the operating system.
+    """
+    store = blob_store()
+    for model in (PersonImage, CapturedFace):
+        moved = skipped = total = 0
+        digests = set()
+        last_id = 0
+        while True:
+            rows = model.query.options(undefer(model.image_data)).filter(
+                model.image_hash.is_(None), model.image_data.isnot(None), model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                try:
+                    stored = set_image(row, row.image_data, store)
+                except UnidentifiedImageError:
+                    skipped += 1
+                    click.echo(f'{model.__tablename__} {row.id}: not an image, left in the table', err=True)
+                    continue
+                moved += 1
+                total += stored.size
+                digests.add(stored.digest)
+            last_id = rows[-1].id
+            db.session.commit()
+        click.echo(f'{model.__tablename__}: {moved} images ({total / 1e6:.1f} MB) moved to '
+                   f'{len(digests)} files, {skipped} skipped')
+
+
+@click.command('prune-blobs')
+@click.option('--min-age', default=3600, show_default=True,
+              help='only delete files not stored or reused for this many seconds (uploads in progress are newer)')
+@with_appcontext
+def prune_blobs_command(min_age):
+    """Delete stored images that no row references, e.g. left by failed uploads."""
+    store = blob_store()
+    used = set()
+    for model in (PersonImage, CapturedFace):
+        used.update(digest for (digest,) in db.session.query(model.image_hash).filter(
+            model.image_hash.isnot(None)).distinct())
+    removed = 0
+    for folder, _, files in os.walk(store.root):
+        for digest in files:
+            if len(digest) != 64 or digest in used:
+                continue  # Referenced, or a temporary file
+            removed += store.delete(digest, min_age=min_age)
+    click.echo(f'{removed} unreferenced files deleted, {len(used)} in use')
+
+
+def register_commands(app):
+    """Add the encoding and image store commands to ``flask``."""
+    app.cli.add_command(encode_images_command)
+    app.cli.add_command(export_gallery_command)
+    app.cli.add_command(migrate_blobs_command)
+    app.cli.add_command(prune_blobs_command)
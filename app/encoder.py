@@ -0,0 +1,145 @@
+"""
+Background encoding of person images into FaceEncoding rows.
+"""
+import queue
+import threading
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.extensions import db
+from app.models import PersonImage, FaceEncoding
+from app.blobstore import image_bytes
+
+
+class EncodingWorker:
+    """Encode person images on a background thread as they are added.
+
+    Routes call ``submit()`` with the ids of newly committed images. When
+    started, the worker also queues every image not encoded yet
+    (``PersonImage.faces`` is NULL), so images added while it was not
+    running are picked up too. ``flask encode-images`` does the same work
+    in the foreground. The application starts it on its first request
+    (``start_once``).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.encoded = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._start_attempted = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.detector = app.config.get('ENCODING_DETECTOR', 'hog')
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_once(self):
+        """Start the worker unless already attempted; a ``before_request`` hook."""
+        if self._start_attempted:
+            return
+        with self._start_lock:
+            if not self._start_attempted:
+                self._start_attempted = True
+                self.start()
+
+    def start(self):
+        """Start the worker thread and queue the images not encoded yet."""
+        if self.running:
+            return self
+        try:
+            import face_recognition  # noqa: F401
+        except ImportError:
+            print("[WARNING] face_recognition is not installed; images will not be encoded on upload")
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="face-encoder", daemon=True)
+        self._thread.start()
+        with self.app.app_context():
+            try:
+                self.submit([image_id for (image_id,) in db.session.query(PersonImage.id).filter(
+                    PersonImage.faces.is_(None)).order_by(PersonImage.id)])
+            except SQLAlchemyError as e:
+                # e.g. person_image.faces is missing until flask db upgrade has run
+                db.session.rollback()
+                print(f"[WARNING] Could not queue images not encoded yet: {e}")
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop the worker; images still queued are encoded on the next start."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, image_ids):
+        """Queue images for encoding; ignored while the worker is not running."""
+        if not self.running:
+            return
+        for image_id in image_ids:
+            self._queue.put(image_id)
+
+    def encode(self, image_id, force=False):
+        """Encode one image and store its faces; returns the number of faces, or None if skipped.
+
+        The image row is locked until its faces are committed, so another
+        process encoding the same image waits and then skips it. Where the
+        database has no row locks (SQLite), the unique (image_id,
+        face_index) constraint makes the second encoder give up instead.
+        Must run inside an application context.
+        """
+        from recognition.training import encode_image_bytes
+
+        image = db.session.get(PersonImage, image_id, with_for_update=True, populate_existing=True)
+        if image is None or (image.faces is not None and not force):
+            db.session.rollback()  # Releases the lock
+            return None
+        try:
+            encodings = encode_image_bytes(image_bytes(image), self.detector)
+            FaceEncoding.query.filter_by(image_id=image_id).delete()
+            for index, encoding in enumerate(encodings):
+                db.session.add(FaceEncoding(image_id=image_id, face_index=index,
+                                            encoding=encoding.astype('<f4').tobytes(),
+                                            detector=self.detector))
+            image.faces = len(encodings)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return None  # Encoded at the same time by another process
+        except Exception:
+            db.session.rollback()
+            self.failed += 1
+            raise
+        self.encoded += 1
+        return image.faces
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                image_id = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self.app.app_context():
+                try:
+                    self.encode(image_id)
+                except Exception as e:
+                    print(f"[ERROR] Failed to encode image {image_id}: {e}")
+
+
+def decode_encodings(blobs):
+    """Stack FaceEncoding.encoding blobs into a (n x 128) float32 array."""
+    if not blobs:
+        return np.zeros((0, 128), dtype=np.float32)
+    return np.frombuffer(b''.join(blobs), dtype='<f4').reshape(-1, 128)
+
+
+# Shared instance, set up by create_app()
+encoder = EncodingWorker()
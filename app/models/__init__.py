@@ -4,6 +4,7 @@ Models package for the Face Recognition application.
 from .user import Admin
 from .person import RecognizedPerson, PersonImage
 from .face import CapturedFace
+from .encoding import FaceEncoding
 
-__all__ = ['Admin', 'RecognizedPerson', 'PersonImage', 'CapturedFace']
+__all__ = ['Admin', 'RecognizedPerson', 'PersonImage', 'CapturedFace', 'FaceEncoding']
 
@@ -0,0 +1,26 @@
+"""
+FaceEncoding model for face encodings computed from person images.
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from app.extensions import db
+
+
+class FaceEncoding(db.Model):
+    """128-d face encoding of one face found in a PersonImage.
+
+    Filled by the background encoder (app/encoder.py) when images are added,
+    so the gallery can be exported without decoding any image.
+    """
+    __tablename__ = 'face_encoding'
+    # One row per face, even when two encoders work on the same image at once
+    __table_args__ = (
+        db.UniqueConstraint('image_id', 'face_index', name='uq_face_encoding_image_id_face_index'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    image_id = db.Column(db.Integer, db.ForeignKey('person_image.id', ondelete='CASCADE'),
+                         nullable=False, index=True)
+    face_index = db.Column(db.Integer, nullable=False, default=0)
+    encoding = db.Column(db.LargeBinary, nullable=False)  # 128 little-endian float32 values
+    detector = db.Column(db.String(20))
+    date_added = db.Column(db.DateTime, default=lambda: datetime.now(ZoneInfo("Africa/Tunis")))
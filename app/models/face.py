@@ -8,12 +8,26 @@ from app.extensions import db
 
 class CapturedFace(db.Model):
     """Model for storing captured face data from recognition system."""
+    # Newest-first listing and keyset pagination, overall and per person. Substring
+    # search on name uses a trigram index on PostgreSQL (see migrations/).
+    __table_args__ = (
+        db.Index('ix_captured_face_capture_date', 'capture_date', 'id'),
+        db.Index('ix_captured_face_recognized_person_id', 'recognized_person_id', 'capture_date', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), default='Unknown')
+    name = db.Column(db.String(100), default='Unknown', index=True)
     capture_date = db.Column(db.DateTime, default=datetime.now(ZoneInfo("Africa/Tunis")))
-    image_data = db.Column(db.LargeBinary)
+    # Image file in the blob store (app/blobstore.py), by SHA-256 hash
+    image_hash = db.Column(db.String(64), index=True)
+    image_size = db.Column(db.Integer)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    # Images saved before the blob store, until flask migrate-blobs moves them; deferred
+    # so listing faces never loads them, has_image is enough to render a row
+    image_data = db.deferred(db.Column(db.LargeBinary))
     confidence = db.Column(db.Float)
     recognized_person_id = db.Column(db.Integer, db.ForeignKey('recognized_person.id'))
     image_format = db.Column(db.String(10))
     recognized_person = db.relationship('RecognizedPerson', backref='captured_faces')
+    has_image = db.column_property(db.or_(image_hash.isnot(None), image_data.columns[0].isnot(None)))
 
@@ -10,7 +10,7 @@ class RecognizedPerson(db.Model):
     """Model for recognized people in the system."""
     __tablename__ = 'recognized_person'
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     title = db.Column(db.String(100))
     date_added = db.Column(db.DateTime, default=datetime.now(ZoneInfo("Africa/Tunis")))
     images = db.relationship('PersonImage', backref='person', lazy=True, cascade="all, delete-orphan")
@@ -21,7 +21,16 @@ class PersonImage(db.Model):
     __tablename__ = 'person_image'
     id = db.Column(db.Integer, primary_key=True)
     person_id = db.Column(db.Integer, db.ForeignKey('recognized_person.id'), nullable=False)
-    image_data = db.Column(db.LargeBinary, nullable=False)
+    # Image file in the blob store (app/blobstore.py), by SHA-256 hash
+    image_hash = db.Column(db.String(64), index=True)
+    image_size = db.Column(db.Integer)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    # Images saved before the blob store, until flask migrate-blobs moves them; deferred
+    image_data = db.deferred(db.Column(db.LargeBinary))
     image_format = db.Column(db.String(10), nullable=False)
     date_added = db.Column(db.DateTime, default=datetime.now(ZoneInfo("Africa/Tunis")))
     is_main = db.Column(db.Boolean, default=False)
+    # Faces found by the background encoder; None until the image has been encoded
+    faces = db.Column(db.Integer)
+    encodings = db.relationship('FaceEncoding', backref='image', lazy=True, cascade="all, delete-orphan")
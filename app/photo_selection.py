@@ -0,0 +1,134 @@
+"""
+Quality scoring and selection of photos captured for enrollment.
+
+Each frame is scored on the sharpness of its face (variance of the
+Laplacian over the face crop) and the size of the face relative to the
+frame. Frames without a face, blurry ones and near-duplicates (by
+difference hash) are dropped, and only the best ones are kept.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import cv2
+import numpy as np
+from flask import current_app
+
+# What detection finds in a photo; the score is derived from it per request
+PhotoMeasures = namedtuple('PhotoMeasures', 'face sharpness face_ratio hash')
+
+MEASURE_CACHE_SIZE = 256
+_detectors = {}
+_measures = OrderedDict()  # (SHA-256 of the photo, detector) -> PhotoMeasures, least recently used first
+_measures_lock = threading.Lock()
+
+
+def _detector():
+    """Face detector of CAPTURE_DETECTOR, created once per process."""
+    from recognition.detectors import create_detector
+
+    backend = current_app.config.get('CAPTURE_DETECTOR', 'haar')
+    if backend not in _detectors:
+        _detectors[backend] = create_detector(backend)
+    return _detectors[backend]
+
+
+def dhash(gray, size=8):
+    """64-bit difference hash of a grayscale image."""
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def measure_photo(data):
+    """Detect the face of one encoded photo; returns PhotoMeasures, or None if it cannot be decoded.
+
+    Results are cached by the SHA-256 of the photo and the detector, as the
+    photos kept from earlier batches are measured again with every batch.
+    """
+    key = (hashlib.sha256(data).hexdigest(), current_app.config.get('CAPTURE_DETECTOR', 'haar'))
+    with _measures_lock:
+        if key in _measures:
+            _measures.move_to_end(key)
+            return _measures[key]
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    measures = None
+    if image is not None:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        boxes = _detector()(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        region = gray
+        face_ratio = 0.0
+        if boxes:
+            top, right, bottom, left = max(boxes, key=lambda b: (b[1] - b[3]) * (b[2] - b[0]))
+            region = gray[max(0, top):bottom, max(0, left):right]
+            face_ratio = (right - left) / gray.shape[1]
+        sharpness = float(cv2.Laplacian(region, cv2.CV_64F).var()) if region.size else 0.0
+        measures = PhotoMeasures(bool(boxes), round(sharpness, 1), round(face_ratio, 3), dhash(gray))
+
+    with _measures_lock:
+        _measures[key] = measures
+        while len(_measures) > MEASURE_CACHE_SIZE:
+            _measures.popitem(last=False)
+    return measures
+
+
+def score_photo(data):
+    """Score one encoded photo; returns None if it cannot be decoded.
+
+    The result is a new dict with ``face`` (whether one was found),
+    ``sharpness`` (of the largest face, or the whole frame without one),
+    ``face_ratio`` (face width over frame width), ``hash`` and the overall
+    ``score``, which depends on CAPTURE_TARGET_FACE_RATIO.
+    """
+    measures = measure_photo(data)
+    if measures is None:
+        return None
+    target_ratio = current_app.config.get('CAPTURE_TARGET_FACE_RATIO', 0.3)
+    return dict(
+        measures._asdict(),
+        # Sharper is better; faces smaller than the target size are penalised
+        score=round(measures.sharpness * min(1.0, measures.face_ratio / target_ratio), 1),
+    )
+
+
+def select_photos(photos, keep):
+    """Pick the best ``keep`` photos from ``{name: score_photo() result}``.
+
+    Returns ``(kept, rejected)``: the kept names, best first, and
+    ``{name: reason}`` for the others, the reason being one of
+    ``unreadable``, ``no_face``, ``too_small``, ``blurry``, ``duplicate``
+    or ``surplus``.
+    """
+    config = current_app.config
+    min_sharpness = config.get('CAPTURE_MIN_SHARPNESS', 40.0)
+    min_face_ratio = config.get('CAPTURE_MIN_FACE_RATIO', 0.1)
+    max_distance = config.get('CAPTURE_DUPLICATE_DISTANCE', 6)
+
+    kept, rejected = [], {}
+    candidates = []
+    for name, photo in photos.items():
+        if photo is None:
+            rejected[name] = 'unreadable'
+        elif not photo['face']:
+            rejected[name] = 'no_face'
+        elif photo['face_ratio'] < min_face_ratio:
+            rejected[name] = 'too_small'
+        elif photo['sharpness'] < min_sharpness:
+            rejected[name] = 'blurry'
+        else:
+            candidates.append(name)
+
+    # Best first, so of two near-duplicates the better one is kept
+    for name in sorted(candidates, key=lambda n: photos[n]['score'], reverse=True):
+        if any(hamming(photos[name]['hash'], photos[other]['hash']) <= max_distance for other in kept):
+            rejected[name] = 'duplicate'
+        elif len(kept) >= keep:
+            rejected[name] = 'surplus'
+        else:
+            kept.append(name)
+    return kept, rejected
@@ -0,0 +1,76 @@
+"""
+Read-only queries returning lightweight rows for the web pages.
+"""
+from datetime import datetime, timedelta
+
+from flask import g
+
+from app.extensions import db
+from app.models import RecognizedPerson, PersonImage, CapturedFace
+
+# Request arguments understood by captured_face_filters()
+CAPTURED_FACE_FILTERS = ('capture_date', 'date_from', 'date_to', 'person_filter')
+
+
+def person_summary_query():
+    """Query of a summary row per person, newest first.
+
+    Each row has id, name, title, date_added, main_image_id (the main
+    image, or the first one if none is marked main) and image_count, all
+    from one aggregated query.
+    """
+    main_image_id = db.func.coalesce(
+        db.func.min(db.case((PersonImage.is_main.is_(True), PersonImage.id))),
+        db.func.min(PersonImage.id))
+    return db.session.query(
+        RecognizedPerson.id, RecognizedPerson.name, RecognizedPerson.title,
+        RecognizedPerson.date_added,
+        main_image_id.label('main_image_id'),
+        db.func.count(PersonImage.id).label('image_count')
+    ).outerjoin(PersonImage, PersonImage.person_id == RecognizedPerson.id).group_by(
+        RecognizedPerson.id
+    ).order_by(RecognizedPerson.date_added.desc(), RecognizedPerson.id.desc())
+
+
+def person_summaries():
+    """Return the rows of person_summary_query(), run at most once per request."""
+    if 'person_summaries' not in g:
+        g.person_summaries = person_summary_query().all()
+    return g.person_summaries
+
+
+def _parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None  # Ignore missing or invalid dates
+
+
+def captured_face_filters(args):
+    """Return the SQL criteria for the captured face filters in ``args``.
+
+    ``capture_date`` selects one day, ``date_from`` and ``date_to`` an
+    inclusive range of days. Days are compared as half-open timestamp
+    ranges so the capture_date index can be used. ``person_filter`` is a
+    person id, or otherwise part of a name.
+    """
+    criteria = []
+    day = _parse_day(args.get('capture_date'))
+    if day:
+        criteria += [CapturedFace.capture_date >= day, CapturedFace.capture_date < day + timedelta(days=1)]
+    date_from = _parse_day(args.get('date_from'))
+    if date_from:
+        criteria.append(CapturedFace.capture_date >= date_from)
+    date_to = _parse_day(args.get('date_to'))
+    if date_to:
+        criteria.append(CapturedFace.capture_date < date_to + timedelta(days=1))
+
+    person_filter = args.get('person_filter')
+    if person_filter:
+        if person_filter.isdigit():
+            # If the filter is a number, treat it as an ID
+            criteria.append(CapturedFace.recognized_person_id == int(person_filter))
+        else:
+            # Otherwise, treat it as a partial name match (trigram index on PostgreSQL)
+            criteria.append(CapturedFace.name.ilike(f'%{person_filter}%'))
+    return criteria
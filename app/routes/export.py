@@ -0,0 +1,79 @@
+"""
+Streaming exports of captured faces and recognized people.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, request, stream_with_context
+from flask_login import login_required
+
+from app.extensions import db
+from app.models import CapturedFace
+from app.queries import captured_face_filters, person_summary_query
+
+export_bp = Blueprint('export', __name__, url_prefix='/export')
+
+BATCH_SIZE = 1000  # Rows fetched from the server-side cursor and written per chunk
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _stream(query, fields, headers, fmt):
+    """Yield ``query``'s rows as CSV or NDJSON, BATCH_SIZE rows per chunk.
+
+    The rows come from a server-side cursor, so memory use does not grow
+    with the size of the export.
+    """
+    result = db.session.execute(query.statement.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(headers)
+    for rows in result.partitions():
+        for row in rows:
+            values = [_value(getattr(row, field)) for field in fields]
+            if fmt == 'csv':
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(fields, values))) + '\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if fmt == 'csv' and buffer.tell():
+        yield buffer.getvalue()  # Header of an empty export
+
+
+def _export(query, fields, headers, filename, fmt):
+    if fmt not in MIMETYPES:
+        abort(404)
+    return Response(stream_with_context(_stream(query, fields, headers, fmt)), mimetype=MIMETYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}',
+                             'X-Accel-Buffering': 'no'})
+
+
+@export_bp.route('/captured_faces.<fmt>')
+@login_required
+def captured_faces(fmt):
+    """Export captured faces, newest first, with the dashboard's filters; never the images."""
+    query = db.session.query(
+        CapturedFace.id, CapturedFace.name, CapturedFace.capture_date,
+        CapturedFace.confidence, CapturedFace.recognized_person_id
+    ).filter(*captured_face_filters(request.args)).order_by(
+        CapturedFace.capture_date.desc(), CapturedFace.id.desc())
+    fields = ['id', 'name', 'capture_date', 'confidence', 'recognized_person_id']
+    headers = ['ID', 'Name', 'Capture Date', 'Confidence', 'RP ID']
+    return _export(query, fields, headers, 'captured_faces', fmt)
+
+
+@export_bp.route('/recognized_people.<fmt>')
+@login_required
+def recognized_people(fmt):
+    """Export recognized people with their image counts."""
+    fields = ['id', 'name', 'title', 'date_added', 'image_count']
+    headers = ['ID', 'Name', 'Title', 'Date Added', 'Images']
+    return _export(person_summary_query(), fields, headers, 'recognized_people', fmt)
@@ -1,25 +1,38 @@
 """
 Routes for managing captured faces.
 """
-import io
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required
-from PIL import Image
 
 from app.extensions import db
 from app.models import CapturedFace, RecognizedPerson, PersonImage
+from app.routes.person import serve_person_image
+from app.thumbnails import send_image, discard_thumbnails
+from app.queries import person_summaries
+from app.encoder import encoder
+from app.blobstore import blob_store, set_image, copy_image, release_blobs
 
 face_bp = Blueprint('face', __name__)
 
 
+def _store_face_image(face):
+    """Make sure the face's image is in the blob store; returns False if it has none."""
+    if not face.image_hash and face.image_data:
+        set_image(face, face.image_data)  # Saved before the blob store existed
+    return bool(face.image_hash)
+
+
 @face_bp.route('/delete_face/<int:id>')
 @login_required
 def delete_face(id):
     """Delete a captured face."""
     face = CapturedFace.query.get_or_404(id)
+    image_hash = face.image_hash
     db.session.delete(face)
     db.session.commit()
+    release_blobs([image_hash])
+    discard_thumbnails('face', id)
     flash('Face deleted successfully')
     return redirect(url_for('main.index'))
 
@@ -29,7 +42,7 @@ def delete_face(id):
 def add_recognized_from_face(id):
     """Add a captured face as a recognized person or link to existing person."""
     face = CapturedFace.query.get_or_404(id)
-    recognized_people = RecognizedPerson.query.all()
+    recognized_people = person_summaries()
 
     if request.method == 'POST':
         action = request.form.get('action')
@@ -55,24 +68,17 @@ def add_recognized_from_face(id):
                 folder = f"dataset/{name}"
                 os.makedirs(folder, exist_ok=True)
 
-                if face.image_data and face.image_format:
-                    print(f"Adding image for {name}: format={face.image_format}, data length={len(face.image_data)}")
-                    
-                    # Save image to folder
-                    img = Image.open(io.BytesIO(face.image_data))
-                    ext = face.image_format.lower()
-                    filename = f"face_{face.id}.{ext}"
-                    image_path = os.path.join(folder, filename)
-                    img.save(image_path)
-                    
-                    # Save image to DB
-                    new_img = PersonImage(
-                        person_id=new_person.id,
-                        image_data=face.image_data,
-                        image_format=face.image_format,
-                        is_main=True
-                    )
+                if _store_face_image(face):
+                    print(f"Adding image for {name}: format={face.image_format}, size={face.image_size}")
+
+                    # The person image shares the face's stored file
+                    new_img = PersonImage(person_id=new_person.id, is_main=True)
+                    copy_image(face, new_img)
                     db.session.add(new_img)
+
+                    # Link image into folder
+                    filename = f"face_{face.id}.{face.image_format.lower()}"
+                    blob_store().link(face.image_hash, os.path.join(folder, filename))
                 else:
                     print(f"Warning: No valid image data for {name}")
                     flash("Failed to add image due to invalid data.", "warning")
@@ -80,6 +86,8 @@ def add_recognized_from_face(id):
                 face.recognized_person_id = new_person.id
                 face.name = name
                 db.session.commit()
+                if face.image_hash:
+                    encoder.submit([new_img.id])
                 flash(f"Face {id} added as recognized person '{name}'.", "success")
                 
             elif action == 'existing':
@@ -96,29 +104,24 @@ def add_recognized_from_face(id):
                 folder = f"dataset/{existing_person.name}"
                 os.makedirs(folder, exist_ok=True)
 
-                if face.image_data and face.image_format:
+                if _store_face_image(face):
                     print(f"Adding image to existing person {existing_person.name}")
-                    
-                    # Save image to folder
-                    img = Image.open(io.BytesIO(face.image_data))
-                    ext = face.image_format.lower()
-                    filename = f"face_{face.id}.{ext}"
-                    image_path = os.path.join(folder, filename)
-                    img.save(image_path)
-                    
-                    # Save image to DB
-                    new_img = PersonImage(
-                        person_id=existing_person.id,
-                        image_data=face.image_data,
-                        image_format=face.image_format,
-                        is_main=False
-                    )
+
+                    # The person image shares the face's stored file
+                    new_img = PersonImage(person_id=existing_person.id, is_main=False)
+                    copy_image(face, new_img)
                     db.session.add(new_img)
+
+                    # Link image into folder
+                    filename = f"face_{face.id}.{face.image_format.lower()}"
+                    blob_store().link(face.image_hash, os.path.join(folder, filename))
                 else:
                     print(f"Warning: No valid image data for {existing_person.name}")
                     flash("Failed to add image due to invalid data.", "warning")
 
                 db.session.commit()
+                if face.image_hash:
+                    encoder.submit([new_img.id])
                 flash(f"Face {id} linked to existing person '{existing_person.name}' (ID: {existing_person.id}).", "success")
             
             return redirect(url_for('main.index'))
@@ -134,21 +137,26 @@ def add_recognized_from_face(id):
 @face_bp.route('/image/<int:id>')
 @login_required
 def serve_image(id):
-    """Serve captured face images."""
+    """Serve a captured face image, or with ?table=recognized a person's main image.
+
+    Add ?size=thumb, small or medium for a thumbnail.
+    """
     if request.args.get('table') == 'recognized':
-        person = RecognizedPerson.query.get(id)
-        if person and person.image_data:
-            mimetype = f'image/{person.image_format.lower()}' if person.image_format else 'image/jpeg'
-            return send_file(io.BytesIO(person.image_data), mimetype=mimetype)
-            
-    face = CapturedFace.query.get(id)
-    if face and face.image_data:
-        mimetype = f'image/{face.image_format.lower()}' if face.image_format else 'image/jpeg'
-        return send_file(io.BytesIO(face.image_data), mimetype=mimetype)
-        
-    person = RecognizedPerson.query.get(id)
-    if person and person.image_data:
-        mimetype = f'image/{person.image_format.lower()}' if person.image_format else 'image/jpeg'
-        return send_file(io.BytesIO(person.image_data), mimetype=mimetype)
-        
-    return "Image not found", 404
\ No newline at end of file
+        image_id = db.session.query(PersonImage.id).filter_by(person_id=id).order_by(
+            PersonImage.is_main.desc(), PersonImage.id.asc()).limit(1).scalar()
+        if image_id is None:
+            return "Image not found", 404
+        return serve_person_image(image_id)
+
+    # Metadata only; the file is sent from the blob store, or a legacy blob loaded when needed
+    meta = db.session.query(CapturedFace.image_hash, CapturedFace.image_size, CapturedFace.image_format,
+                            CapturedFace.capture_date, db.func.length(CapturedFace.image_data)
+                            ).filter(CapturedFace.id == id).first()
+    if meta is None or not (meta[0] or meta[4]):
+        return "Image not found", 404
+    image_hash, image_size, image_format, capture_date, length = meta
+    if image_hash:
+        return send_image('face', id, image_format, image_size, capture_date,
+                          path=blob_store().path(image_hash))
+    return send_image('face', id, image_format, length, capture_date,
+                      lambda: db.session.query(CapturedFace.image_data).filter(CapturedFace.id == id).scalar())
@@ -1,49 +1,104 @@
 """
 Main application routes.
 """
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, current_app, abort, Response, url_for
 from flask_login import login_required
 from datetime import datetime
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+from urllib.request import urlopen
 from sqlalchemy import and_
-from app.models import RecognizedPerson, CapturedFace
+from app.models import CapturedFace
 from app.extensions import db
+from app.queries import person_summaries, captured_face_filters, CAPTURED_FACE_FILTERS
 
 main_bp = Blueprint('main', __name__)
 
+FACES_PER_PAGE = 20
+
+
+def _cursor(face):
+    """Keyset position of a captured face: its capture date and id."""
+    return f"{face.capture_date.isoformat()}_{face.id}"
+
+
+def _parse_cursor(value):
+    try:
+        stamp, face_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(stamp), int(face_id)
+    except (AttributeError, ValueError):
+        return None
+
+
 @main_bp.route('/')
 @login_required
 def index():
-    """Main dashboard showing recognized people and captured faces."""
-    recognized_people = RecognizedPerson.query.order_by(RecognizedPerson.date_added.desc()).all()
+    """Main dashboard showing recognized people and captured faces.
+
+    Captured faces are paginated by keyset on (capture_date, id): ``after``
+    continues with older faces, ``before`` goes back to newer ones, so a
+    page costs the same however many faces are stored.
+    """
+    # Only the id of each person's main image, never the images themselves
+    recognized_people = person_summaries()
     
-    # Get filter parameters
-    capture_date = request.args.get('capture_date')
-    person_filter = request.args.get('person_filter')
+    # Filters are kept in the pagination links
+    filters = {key: request.args[key] for key in CAPTURED_FACE_FILTERS if request.args.get(key)}
+    query = CapturedFace.query.filter(*captured_face_filters(request.args))
     
-    # Base query for captured faces
-    query = CapturedFace.query
+    # One page of faces, newest first, fetching one extra row to know if there is another page
+    key = db.tuple_(CapturedFace.capture_date, CapturedFace.id)
+    after = _parse_cursor(request.args.get('after'))
+    before = _parse_cursor(request.args.get('before'))
+    if before:
+        captured_faces = query.filter(key > before).order_by(
+            CapturedFace.capture_date.asc(), CapturedFace.id.asc()).limit(FACES_PER_PAGE + 1).all()
+        has_newer = len(captured_faces) > FACES_PER_PAGE
+        captured_faces = captured_faces[:FACES_PER_PAGE][::-1]
+        has_older = True
+    else:
+        if after:
+            query = query.filter(key < after)
+        captured_faces = query.order_by(
+            CapturedFace.capture_date.desc(), CapturedFace.id.desc()).limit(FACES_PER_PAGE + 1).all()
+        has_older = len(captured_faces) > FACES_PER_PAGE
+        captured_faces = captured_faces[:FACES_PER_PAGE]
+        has_newer = after is not None
+    newer_url = older_url = None
+    if captured_faces and has_newer:
+        newer_url = url_for('main.index', before=_cursor(captured_faces[0]), **filters)
+    if captured_faces and has_older:
+        older_url = url_for('main.index', after=_cursor(captured_faces[-1]), **filters)
     
-    # Apply filters
-    if capture_date:
+    return render_template('index.html', recognized_people=recognized_people, captured_faces=captured_faces,
+                           newer_url=newer_url, older_url=older_url, filters=filters)
+
+
+@main_bp.route('/preview/<camera_id>')
+@login_required
+def preview(camera_id):
+    """Proxy a camera's live MJPEG preview from the door monitor.
+
+    The monitor only encodes frames while this stream is open, so closing
+    the page stops the work on the monitor side as well.
+    """
+    url = '{}/{}.mjpg'.format(current_app.config['PREVIEW_URL'].rstrip('/'), quote(camera_id, safe=''))
+    try:
+        upstream = urlopen(url, timeout=10)
+    except HTTPError as e:
+        abort(404 if e.code == 404 else 502)
+    except (URLError, OSError):
+        abort(502)
+
+    def generate():
         try:
-            # Parse the date and filter for the entire day
-            filter_date = datetime.strptime(capture_date, '%Y-%m-%d')
-            query = query.filter(
-                db.func.date(CapturedFace.capture_date) == filter_date.date()
-            )
-        except ValueError:
-            pass  # Ignore invalid date formats
-    
-    if person_filter:
-        # Handle person name or ID filter
-        if person_filter.isdigit():
-            # If the filter is a number, treat it as an ID
-            query = query.filter(CapturedFace.recognized_person_id == int(person_filter))
-        else:
-            # Otherwise, treat it as a partial name match
-            query = query.filter(CapturedFace.name.ilike(f'%{person_filter}%'))
-    
-    # Execute query with ordering
-    captured_faces = query.order_by(CapturedFace.capture_date.desc()).all()
-    
-    return render_template('index.html', recognized_people=recognized_people, captured_faces=captured_faces)
\ No newline at end of file
+            while True:
+                chunk = upstream.read1(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            upstream.close()
+
+    return Response(generate(), content_type=upstream.headers['Content-Type'],
+                    headers={'Cache-Control': 'no-cache, private', 'X-Accel-Buffering': 'no'})
@@ -1,15 +1,19 @@
 """
 Person-related routes for managing RecognizedPerson entities.
 """
-from flask import Blueprint, render_template, request, jsonify, url_for, redirect, flash, send_file
+from flask import Blueprint, render_template, request, jsonify, url_for, redirect, flash, abort, current_app
 from flask_login import login_required
 from app.models import RecognizedPerson, PersonImage
 from app.extensions import db
+from app.thumbnails import send_image, discard_thumbnails
+from app.encoder import encoder
+from app.blobstore import blob_store, set_image, release_blobs, write_file
+from app.photo_selection import score_photo, select_photos
 import os
 import shutil
+import glob
 from pathlib import Path
-import io
-from PIL import Image
+from werkzeug.utils import secure_filename
 
 person_bp = Blueprint('person', __name__)
 
@@ -54,28 +58,21 @@ def add_person():
             os.makedirs(final_folder, exist_ok=True)
 
         # Process uploaded images
+        store = blob_store()
+        added_images = []
         for index, image in enumerate(images):
             if image and allowed_file(image.filename):
-                # Save the image to the dataset folder (if not already saved via temp folder)
-                image_path = os.path.join(final_folder, image.filename)
-                if not os.path.exists(image_path):  # Avoid overwriting if already moved
-                    image.save(image_path)
-
-                # Save the image to the database
-                img = Image.open(image)
-                img_byte_arr = io.BytesIO()
-                img_format = img.format if img.format else 'PNG'
-                img.save(img_byte_arr, format=img_format)
-                img_byte_arr.seek(0)  # Reset buffer position
-                new_img = PersonImage(
-                    person_id=person.id,
-                    image_data=img_byte_arr.getvalue(),
-                    image_format=img_format,
-                    is_main=(str(index) == main_image_index)
-                )
+                # Store the original bytes once; the database row only references them
+                new_img = PersonImage(person_id=person.id, is_main=(str(index) == main_image_index))
+                set_image(new_img, image.read(), store)
                 db.session.add(new_img)
 
+                # Link the image into the dataset folder (replacing a copy saved via the temp folder)
+                store.link(new_img.image_hash, os.path.join(final_folder, image.filename))
+                added_images.append(new_img)
+
         db.session.commit()
+        encoder.submit(img.id for img in added_images)
         flash('Person added successfully')
         return redirect(url_for('main.index'))
     except Exception as e:
@@ -109,7 +106,8 @@ def edit_person(id):
 
         # Handle deleted images
         deleted_images = request.form.get("deleted_images", "")
-        current_images_count = len(person.images)  # Define the count of current images
+        released = []
+        current_images_count = PersonImage.query.filter_by(person_id=person.id).count()
         if deleted_images:
             deleted_image_ids = [img_id for img_id in deleted_images.split(",") if img_id.isdigit()]
 
@@ -125,34 +123,26 @@ def edit_person(id):
                     image_path = os.path.join(f"dataset/{person.name}", f"{image.id}.{image.image_format.lower()}")
                     if os.path.exists(image_path):
                         os.remove(image_path)
+                    released.append(image.image_hash)
                     db.session.delete(image)  # Delete from database
+                    discard_thumbnails('person', image.id)
 
         # Handle new images from form submission
         images = request.files.getlist('images')
         folder = f"dataset/{person.name}"
         os.makedirs(folder, exist_ok=True)
         new_images = []
+        store = blob_store()
 
         for index, image in enumerate(images):
             if image and allowed_file(image.filename):
-                img = Image.open(image)
-                img_byte_arr = io.BytesIO()
-                img_format = img.format if img.format else 'PNG'
-                img.save(img_byte_arr, format=img_format)  # Save image to BytesIO first
-                img_byte_arr.seek(0)  # Reset buffer position
-
-                new_img = PersonImage(
-                    person_id=person.id,
-                    image_data=img_byte_arr.getvalue(),  # Use populated img_byte_arr
-                    image_format=img_format,
-                    is_main=False
-                )
+                new_img = PersonImage(person_id=person.id, is_main=False)
+                set_image(new_img, image.read(), store)  # Original bytes, stored once
                 db.session.add(new_img)
                 db.session.flush()
 
-                image_filename = f"{new_img.id}.{img_format.lower()}"
-                image_path = os.path.join(folder, image_filename)
-                img.save(image_path, format=img_format)  # Save to file system
+                image_filename = f"{new_img.id}.{new_img.image_format.lower()}"
+                store.link(new_img.image_hash, os.path.join(folder, image_filename))  # Link into dataset folder
                 new_images.append((new_img, f"new-{index}"))
 
         # Handle main image selection
@@ -177,6 +167,8 @@ def edit_person(id):
 
         try:
             db.session.commit()
+            release_blobs(released)
+            encoder.submit(new_img.id for new_img, _ in new_images)
             flash('Person updated successfully')
             return redirect(url_for('main.index'))
         except Exception as e:
@@ -192,10 +184,19 @@ def edit_person(id):
 @person_bp.route('/person_image/<int:image_id>')
 @login_required
 def serve_person_image(image_id):
-    """Serve a person's image."""
-    img = PersonImage.query.get_or_404(image_id)
-    mimetype = f'image/{img.image_format.lower()}'
-    return send_file(io.BytesIO(img.image_data), mimetype=mimetype)
+    """Serve a person's image; add ?size=thumb, small or medium for a thumbnail."""
+    # Metadata only; the file is sent from the blob store, or a legacy blob loaded when needed
+    meta = db.session.query(PersonImage.image_hash, PersonImage.image_size, PersonImage.image_format,
+                            PersonImage.date_added, db.func.length(PersonImage.image_data)
+                            ).filter(PersonImage.id == image_id).first()
+    if meta is None:
+        abort(404)
+    image_hash, image_size, image_format, date_added, length = meta
+    if image_hash:
+        return send_image('person', image_id, image_format, image_size, date_added,
+                          path=blob_store().path(image_hash))
+    return send_image('person', image_id, image_format, length, date_added,
+                      lambda: db.session.query(PersonImage.image_data).filter(PersonImage.id == image_id).scalar())
 
 @person_bp.route('/delete_person/<int:id>')
 @login_required
@@ -205,8 +206,13 @@ def delete_person(id):
     folder = f"dataset/{person.name}"
     if os.path.exists(folder):
         shutil.rmtree(folder)
+    image_ids = [img.id for img in person.images]
+    image_hashes = [img.image_hash for img in person.images]
     db.session.delete(person)
     db.session.commit()
+    release_blobs(image_hashes)
+    for image_id in image_ids:
+        discard_thumbnails('person', image_id)
     flash('Person deleted successfully')
     return redirect(url_for('main.index'))
 
@@ -237,12 +243,67 @@ def save_photo():
         if not allowed_file(image.filename):
             return jsonify({'status': 'error', 'message': 'Invalid file type. Allowed types: png, jpg, jpeg'}), 400
         image_path = os.path.join(folder, image.filename)
-        image.save(image_path)
+        write_file(image_path, image.read())
         return jsonify({'status': 'success', 'message': f'Photo saved to {image_path}'}), 200
     except Exception as e:
         print(f"Error saving photo: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@person_bp.route('/select_photos', methods=['POST'])
+@login_required
+def select_captured_photos():
+    """Score a batch of captured photos and keep the best ones in a folder.
+
+    Photos named capture_* already in the folder compete with the new
+    ones, so across batches the folder holds the best ``keep`` captures
+    overall. Returns the kept photos, best first, and why the others were
+    dropped.
+    """
+    try:
+        images = request.files.getlist('images')
+        folder = request.form.get('folder')
+        keep = request.form.get('keep', current_app.config.get('CAPTURE_KEEP_PHOTOS', 15), type=int)
+        if not images or not folder:
+            return jsonify({'status': 'error', 'message': 'Images and folder are required'}), 400
+        # Files in the folder get deleted, so it must be a capture folder made by the
+        # add person form (dataset/temp_<session>), never dataset/ or a person's folder
+        real_folder = os.path.realpath(folder)
+        if (os.path.dirname(real_folder) != os.path.realpath('dataset')
+                or not os.path.basename(real_folder).startswith('temp_')):
+            return jsonify({'status': 'error', 'message': 'Folder must be a dataset/temp_* capture folder'}), 400
+        os.makedirs(folder, exist_ok=True)
+
+        photos, uploads = {}, {}
+        for path in glob.glob(os.path.join(folder, 'capture_*')):
+            with open(path, 'rb') as f:
+                photos[os.path.basename(path)] = score_photo(f.read())
+        for image in images:
+            filename = secure_filename(image.filename or '')
+            if not allowed_file(filename):
+                continue
+            if not filename.startswith('capture_'):
+                filename = f'capture_{filename}'
+            uploads[filename] = image.read()
+            photos[filename] = score_photo(uploads[filename])
+
+        kept, rejected = select_photos(photos, keep)
+        for filename in kept:
+            if filename in uploads:
+                write_file(os.path.join(folder, filename), uploads[filename])
+        for filename in rejected:
+            if filename not in uploads:
+                os.remove(os.path.join(folder, filename))  # Displaced by better photos
+        return jsonify({
+            'status': 'success',
+            'kept': [dict(filename=filename, score=photos[filename]['score'],
+                          sharpness=photos[filename]['sharpness'], face_ratio=photos[filename]['face_ratio'])
+                     for filename in kept],
+            'rejected': rejected,
+        }), 200
+    except Exception as e:
+        print(f"Error selecting photos: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @person_bp.route('/cleanup_temp', methods=['POST'])
 @login_required
 def cleanup_temp():
@@ -265,4 +326,5 @@ def capture_photos():
     """Display the photo capture page."""
     temp_folder = request.args.get('temp_folder')
     name = request.args.get('name')
-    return render_template('capture_photos.html', temp_folder=temp_folder, name=name)
\ No newline at end of file
+    return render_template('capture_photos.html', temp_folder=temp_folder, name=name,
+                           keep=current_app.config.get('CAPTURE_KEEP_PHOTOS', 15))
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Thumbnails and HTTP caching for stored images.
+
+Images are identified by a version string built from metadata only (row
+id, blob length and date), so ETag and Last-Modified can be computed and
+conditional requests answered with 304 without loading the blob.
+Thumbnails are generated lazily, in WebP when the browser accepts it and
+JPEG otherwise, and kept on disk under THUMBNAIL_DIR.
+"""
+import glob
+import io
+import os
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+from flask import abort, current_app, request, send_file
+from PIL import Image, ImageOps, features
+from werkzeug.http import is_resource_modified
+
+# Longest side in pixels of each ?size= variant; no size serves the original
+SIZES = {'thumb': 160, 'small': 320, 'medium': 640}
+MAX_AGE = 86400  # Images never change in place, only get deleted
+
+
+def thumbnail_dir():
+    """Absolute path of the thumbnail cache, created on first use."""
+    path = os.path.abspath(current_app.config.get('THUMBNAIL_DIR', 'thumbnails'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def make_thumbnail(data, size, fmt='JPEG', quality=80):
+    """Return ``data`` resized to fit ``size`` x ``size``, encoded as ``fmt``."""
+    img = Image.open(io.BytesIO(data))
+    img.draft('RGB', (size, size))  # Lets JPEG decode at a reduced scale
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((size, size))
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    out = io.BytesIO()
+    img.save(out, format=fmt, quality=quality)
+    return out.getvalue()
+
+
+def discard_thumbnails(kind, image_id):
+    """Remove the cached thumbnails of a deleted image."""
+    for path in glob.glob(os.path.join(thumbnail_dir(), f'{kind}-{image_id}-*')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _utc(value):
+    """Return ``value`` in UTC; naive dates are in the application's TIMEZONE."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=ZoneInfo(current_app.config.get('TIMEZONE', 'Africa/Tunis')))
+    return value.astimezone(timezone.utc)
+
+
+def send_image(kind, image_id, image_format, length, modified, load_data=None, path=None):
+    """Send a stored image, or a thumbnail of it for ``?size=``.
+
+    ``length`` and ``modified`` come from the row's metadata, ``modified``
+    being naive in TIMEZONE like the stored dates. The image is
+    the file at ``path`` (from the blob store, sent without copying) or
+    else the bytes returned by ``load_data``, which is only called when
+    the response actually needs them.
+    """
+    size = request.args.get('size')
+    if size and size not in SIZES:
+        abort(400)
+    if size:
+        webp = 'image/webp' in request.accept_mimetypes and features.check('webp')
+        fmt = 'WEBP' if webp else 'JPEG'
+    else:
+        fmt = (image_format or 'JPEG').upper()
+    modified = _utc(modified) if modified else None
+    stamp = int(modified.timestamp()) if modified else 0
+    etag = f'{kind}-{image_id}-{length}-{stamp}-{size or "full"}-{fmt.lower()}'
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modified):
+        response = current_app.response_class(status=304)
+    elif size:
+        thumbnail = os.path.join(thumbnail_dir(), f'{etag}.{fmt.lower()}')
+        if not os.path.exists(thumbnail):
+            data = _read(path) if path else load_data()
+            if not data:
+                abort(404)
+            tmp = f'{thumbnail}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(make_thumbnail(data, SIZES[size], fmt))
+            os.replace(tmp, thumbnail)
+        response = send_file(thumbnail, mimetype=f'image/{fmt.lower()}', etag=False, conditional=False)
+    elif path:
+        if not os.path.exists(path):
+            abort(404)
+        response = send_file(path, mimetype=f'image/{fmt.lower()}', etag=False, conditional=False)
+    else:
+        data = load_data()
+        if not data:
+            abort(404)
+        response = send_file(io.BytesIO(data), mimetype=f'image/{fmt.lower()}', etag=False,
+                             conditional=False)
+
+    response.set_etag(etag)
+    if modified:
+        response.last_modified = modified
+    response.cache_control.no_cache = None  # send_file's default; images are safe to reuse
+    response.cache_control.private = True
+    response.cache_control.max_age = MAX_AGE
+    if size:
+        response.vary.add('Accept')
+    return response
@@ -0,0 +1,3 @@
+"""
+Offline performance benchmarks for the Face Recognition application.
+"""
@@ -0,0 +1,173 @@
+"""
+Query plans and latency of the dashboard's captured-face queries.
+
+Fills a synthetic table shaped like captured_face (5M rows by default,
+without image blobs), then runs the old and new form of each dashboard
+query before and after creating the indexes of migration 4b7e2c91d0a3.
+Prints each plan and the median latency. Use a scratch PostgreSQL
+database; SQLite works for smaller runs.
+
+    python -m benchmarks.capture_queries --database postgresql://localhost/bench --rows 5000000
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+TABLE = "bench_captured_face"
+PEOPLE = 500
+START = datetime(2024, 1, 1)
+DAYS = 730
+
+INDEXES = [
+    f"CREATE INDEX {TABLE}_capture_date ON {TABLE} (capture_date, id)",
+    f"CREATE INDEX {TABLE}_recognized_person_id ON {TABLE} (recognized_person_id, capture_date, id)",
+    f"CREATE INDEX {TABLE}_name ON {TABLE} (name)",
+]
+TRIGRAM_INDEX = f"CREATE INDEX {TABLE}_name_trgm ON {TABLE} USING gin (name gin_trgm_ops)"
+
+PAGE = "ORDER BY capture_date DESC, id DESC LIMIT 21"
+
+
+def fill(conn, dialect, rows):
+    """Create the synthetic table: a third unknown faces, the rest spread over PEOPLE people."""
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    if dialect == "postgresql":
+        conn.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                id serial PRIMARY KEY, name varchar(100), capture_date timestamp,
+                confidence float, recognized_person_id integer, image_format varchar(10))"""))
+        conn.execute(text(f"""
+            INSERT INTO {TABLE} (name, capture_date, confidence, recognized_person_id, image_format)
+            SELECT CASE WHEN g % 3 = 0 THEN 'Unknown' ELSE 'person_' || (g % {PEOPLE}) END,
+                   timestamp '{START:%Y-%m-%d}' + random() * interval '{DAYS} days',
+                   random(),
+                   CASE WHEN g % 3 = 0 THEN NULL ELSE g % {PEOPLE} END,
+                   'JPEG'
+            FROM generate_series(1, :rows) AS g"""), {"rows": rows})
+        conn.execute(text(f"ANALYZE {TABLE}"))
+    else:
+        conn.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                id integer PRIMARY KEY, name varchar(100), capture_date datetime,
+                confidence float, recognized_person_id integer, image_format varchar(10))"""))
+        conn.execute(text(f"""
+            WITH RECURSIVE seq(g) AS (SELECT 1 UNION ALL SELECT g + 1 FROM seq WHERE g < :rows)
+            INSERT INTO {TABLE} (name, capture_date, confidence, recognized_person_id, image_format)
+            SELECT CASE WHEN g % 3 = 0 THEN 'Unknown' ELSE 'person_' || (g % {PEOPLE}) END,
+                   datetime('{START:%Y-%m-%d}', '+' || (abs(random()) % {DAYS * 86400}) || ' seconds'),
+                   abs(random()) % 1000 / 1000.0,
+                   CASE WHEN g % 3 = 0 THEN NULL ELSE g % {PEOPLE} END,
+                   'JPEG'
+            FROM seq"""), {"rows": rows})
+        conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def queries(dialect, rows):
+    """Return {query name: {form: (sql, params)}} for the old and new form of each query."""
+    day = START + timedelta(days=DAYS // 2)
+    fmt = "%Y-%m-%d %H:%M:%S"
+    ilike = "ILIKE" if dialect == "postgresql" else "LIKE"
+    # A cursor about 100k rows into the newest-first listing
+    cursor_date = START + timedelta(days=DAYS * (1 - min(1.0, 100000 / rows)))
+    return {
+        "day filter": {
+            "date()": (f"SELECT id FROM {TABLE} WHERE date(capture_date) = :day {PAGE}",
+                       {"day": day.date() if dialect == "postgresql" else day.strftime("%Y-%m-%d")}),
+            "range": (f"SELECT id FROM {TABLE} WHERE capture_date >= :start AND capture_date < :end {PAGE}",
+                      {"start": day.strftime(fmt), "end": (day + timedelta(days=1)).strftime(fmt)}),
+        },
+        "person page": {
+            "by id": (f"SELECT id FROM {TABLE} WHERE recognized_person_id = :person {PAGE}", {"person": 42}),
+        },
+        "name search": {
+            "substring": (f"SELECT id FROM {TABLE} WHERE name {ilike} :pattern {PAGE}", {"pattern": "%son_42%"}),
+        },
+        "deep page": {
+            "offset": (f"SELECT id FROM {TABLE} {PAGE} OFFSET 100000", {}),
+            "keyset": (f"SELECT id FROM {TABLE} WHERE (capture_date, id) < (:date, :id) {PAGE}",
+                       {"date": cursor_date.strftime(fmt), "id": 0}),
+        },
+    }
+
+
+def explain(conn, dialect, sql, params):
+    """Return the query plan as text."""
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if dialect == "postgresql" else "EXPLAIN QUERY PLAN "
+    rows = conn.execute(text(prefix + sql), params).fetchall()
+    return "\n".join(str(row[0]) if dialect == "postgresql" else str(row[-1]) for row in rows)
+
+
+def latency(conn, sql, params, repeat):
+    """Median milliseconds to run a query and fetch its rows."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        times.append(1000 * (time.perf_counter() - start))
+    return statistics.median(times)
+
+
+def run(conn, dialect, rows, repeat, show_plans):
+    """Time every query form; returns a list of result dicts."""
+    results = []
+    for name, forms in queries(dialect, rows).items():
+        for form, (sql, params) in forms.items():
+            plan = explain(conn, dialect, sql, params)
+            result = {"query": name, "form": form, "median_ms": round(latency(conn, sql, params, repeat), 3)}
+            results.append(result)
+            if show_plans:
+                print(f"--- {name} ({form}) ---\n{plan}\n")
+            result["plan"] = plan
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", required=True, help="SQLAlchemy URL of a scratch database")
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic table afterwards")
+    parser.add_argument("--plans", action="store_true", help="print every query plan")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database)
+    dialect = engine.dialect.name
+    results = {}
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        fill(conn, dialect, args.rows)
+        conn.commit()
+        print(f"[INFO] {args.rows} rows in {time.perf_counter() - start:.1f} s")
+
+        results["no indexes"] = run(conn, dialect, args.rows, args.repeat, args.plans)
+        start = time.perf_counter()
+        for ddl in INDEXES:
+            conn.execute(text(ddl))
+        if dialect == "postgresql":
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(TRIGRAM_INDEX))
+        conn.execute(text(f"ANALYZE {TABLE}"))
+        conn.commit()
+        print(f"[INFO] indexes built in {time.perf_counter() - start:.1f} s")
+        results["indexed"] = run(conn, dialect, args.rows, args.repeat, args.plans)
+
+        if not args.keep:
+            conn.execute(text(f"DROP TABLE {TABLE}"))
+            conn.commit()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'query':<14} {'form':<10} {'no indexes':>12} {'indexed':>12}")
+    for before, after in zip(results["no indexes"], results["indexed"]):
+        print(f"{before['query']:<14} {before['form']:<10} "
+              f"{before['median_ms']:>9.2f} ms {after['median_ms']:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Latency and recall of the face detector backends on the dataset images.
+
+Every image in ``dataset/`` shows exactly one person, so recall is the
+fraction of images where a backend finds at least one face. Extra boxes
+per image are reported as a rough false-positive signal.
+
+    python -m benchmarks.detectors --backends hog haar haar+hog --scale 1.0 0.5
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+from imutils import paths
+
+from recognition.detectors import create_detector
+
+
+def load_images(dataset, limit=None):
+    """Return the dataset images as RGB arrays."""
+    images = []
+    for path in sorted(paths.list_images(dataset))[:limit]:
+        image = cv2.imread(path)
+        if image is not None:
+            images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    return images
+
+
+def run(detector, images, repeat=1):
+    """Return latency percentiles, recall and extra boxes per image for one detector."""
+    detector(images[0])  # Load the model outside the timed loop
+    latencies, found, extra = [], 0, 0
+    for _ in range(repeat):
+        for image in images:
+            start = time.perf_counter()
+            boxes = detector(image)
+            latencies.append(1000 * (time.perf_counter() - start))
+            found += bool(boxes)
+            extra += max(0, len(boxes) - 1)
+    total = len(images) * repeat
+    return {
+        "median_ms": float(np.median(latencies)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": found / total,
+        "extra_boxes": extra / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--backends", nargs="+", default=["hog", "haar", "haar+hog"])
+    parser.add_argument("--scale", type=float, nargs="+", default=[1.0, 0.5])
+    parser.add_argument("--dnn-model", help="YuNet .onnx or SSD .caffemodel for the dnn backend")
+    parser.add_argument("--dnn-config", help="SSD deploy prototxt for a .caffemodel")
+    parser.add_argument("--limit", type=int, help="only use the first N images")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    images = load_images(args.dataset, args.limit)
+    results = []
+    for backend in args.backends:
+        for scale in args.scale:
+            options = {"scale": scale}
+            if backend == "dnn" and args.dnn_model:
+                options.update(model=args.dnn_model, config=args.dnn_config)
+            try:
+                result = run(create_detector(backend, **options), images, args.repeat)
+            except Exception as e:
+                print(f"[WARNING] {backend} (scale {scale}) skipped: {e}")
+                continue
+            results.append(dict(backend=backend, scale=scale, images=len(images), **result))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<12}{'scale':>7}{'median ms':>11}{'p95 ms':>9}{'recall':>8}{'extra':>7}")
+    for r in results:
+        print(f"{r['backend']:<12}{r['scale']:>7.2f}{r['median_ms']:>11.1f}{r['p95_ms']:>9.1f}"
+              f"{r['recall']:>8.2f}{r['extra_boxes']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
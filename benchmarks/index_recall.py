@@ -0,0 +1,81 @@
+"""
+Recall and latency of the approximate matcher index against the exact scan.
+
+Builds a synthetic gallery shaped like a real one (many people, up to 50
+encodings each) or loads a gallery file, then compares every index
+configuration with the exact brute-force index on the same queries.
+
+    python -m benchmarks.index_recall --size 100000 --probes 4 8 16
+"""
+import argparse
+import time
+
+import numpy as np
+
+from recognition.gallery import load_gallery
+from recognition.index import ExactIndex, IVFIndex
+
+
+def synthetic_gallery(size, per_person=50, seed=0):
+    """Return a (size x 128) float32 gallery of clustered encodings."""
+    rng = np.random.default_rng(seed)
+    people = max(1, size // per_person)
+    centers = rng.normal(scale=0.06, size=(people, 128)).astype(np.float32)
+    labels = np.arange(size) % people
+    noise = rng.normal(scale=0.02, size=(size, 128)).astype(np.float32)
+    return centers[labels] + noise
+
+
+def time_search(index, queries, k, batch):
+    """Return (distances, indices, milliseconds per query)."""
+    distances, indices = [], []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch):
+        d, ix = index.search(queries[i:i + batch], k)
+        distances.append(d)
+        indices.append(ix)
+    elapsed = time.perf_counter() - start
+    return np.vstack(distances), np.vstack(indices), 1000 * elapsed / len(queries)
+
+
+def recall(exact_indices, approx_indices):
+    """Fraction of the exact top-k neighbours also returned by the approximate index."""
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact_indices, approx_indices))
+    return hits / exact_indices.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000, help="synthetic gallery size")
+    parser.add_argument("--gallery", help="use a gallery file instead of a synthetic one")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=4, help="faces matched per call (faces per frame)")
+    parser.add_argument("--lists", type=int, default=None, help="IVF bucket count (default sqrt(size))")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    gallery = load_gallery(args.gallery).encodings if args.gallery else synthetic_gallery(args.size)
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(gallery), min(args.queries, len(gallery)), replace=False)
+    queries = gallery[picks] + rng.normal(scale=0.02, size=(len(picks), 128)).astype(np.float32)
+
+    print(f"[INFO] gallery={len(gallery)} queries={len(queries)} k={args.k} batch={args.batch}")
+    exact = ExactIndex(gallery)
+    exact_d, exact_i, exact_ms = time_search(exact, queries, args.k, args.batch)
+    print(f"{'index':<18}{'build s':>9}{'ms/query':>10}{'speedup':>9}{'recall@1':>10}{'recall@k':>10}")
+    print(f"{'exact':<18}{0.0:>9.2f}{exact_ms:>10.3f}{1.0:>9.1f}{1.0:>10.3f}{1.0:>10.3f}")
+
+    start = time.perf_counter()
+    ivf = IVFIndex(gallery, n_lists=args.lists)
+    build = time.perf_counter() - start
+    for n_probe in args.probes:
+        ivf.n_probe = max(1, min(n_probe, ivf.n_lists))
+        _, ivf_i, ivf_ms = time_search(ivf, queries, args.k, args.batch)
+        print(f"{f'ivf/{ivf.n_lists} p={ivf.n_probe}':<18}{build:>9.2f}{ivf_ms:>10.3f}"
+              f"{exact_ms / ivf_ms:>9.1f}{recall(exact_i[:, :1], ivf_i[:, :1]):>10.3f}"
+              f"{recall(exact_i, ivf_i):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Benchmark suite for the recognition and web hot paths.
+
+Runs offline on a CPU-only machine: detection and encoding use the
+images in ``dataset/`` (synthetic frames if there are none), matching
+uses synthetic galleries of 1k, 10k and 100k encodings, persistence
+writes captured faces through CaptureWriter to SQLite (or the database
+given with --database), and the web cases request the dashboard and
+image endpoints through the Flask test client against seeded data.
+
+Results are written as JSON, one entry per case with latency
+percentiles, and can be compared with an earlier run:
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+
+SUITES = ["detection", "encoding", "matching", "persistence", "web"]
+GALLERY_SIZES = [1000, 10000, 100000]
+FRAME_SIZE = (480, 640)
+SEED_START = datetime(2026, 1, 1)
+
+
+def measure(fn, repeat, warmup=1):
+    """Call ``fn`` ``warmup + repeat`` times; return latency stats of the timed calls in ms."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(1000 * (time.perf_counter() - start))
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "runs": repeat,
+    }
+
+
+def synthetic_frames(count, seed=0):
+    """Return RGB frames with a smooth background and a bright face-sized blob."""
+    rng = np.random.default_rng(seed)
+    height, width = FRAME_SIZE
+    frames = []
+    for _ in range(count):
+        frame = cv2.GaussianBlur((rng.random((height, width, 3)) * 255).astype(np.uint8), (0, 0), 5)
+        cv2.ellipse(frame, (width // 2, height // 2), (70, 90), 0, 0, 360, (200, 170, 150), -1)
+        frames.append(frame)
+    return frames
+
+
+def load_frames(dataset, limit):
+    """Return (RGB images, source): the dataset images, or synthetic frames if there are none."""
+    from benchmarks.detectors import load_images
+
+    images = load_images(dataset, limit) if os.path.isdir(dataset) else []
+    if images:
+        return images, "dataset"
+    return synthetic_frames(limit or 20), "synthetic"
+
+
+def bench_detection(args):
+    """Latency of each detector backend per image."""
+    from benchmarks.detectors import run
+    from recognition.detectors import create_detector
+
+    images, source = load_frames(args.dataset, args.images)
+    results = []
+    for backend in args.backends:
+        try:
+            detector = create_detector(backend)
+            stats = run(detector, images, repeat=args.detection_repeat)
+        except Exception as e:
+            print(f"[WARNING] detection/{backend} skipped: {e}")
+            continue
+        stats = {key: round(value, 3) for key, value in stats.items()}
+        results.append(dict(case=f"detection/{backend}", source=source, images=len(images), **stats))
+    return results
+
+
+def bench_encoding(args):
+    """Latency of computing one 128-d face encoding."""
+    try:
+        import face_recognition
+    except ImportError:
+        print("[WARNING] encoding skipped: face_recognition is not installed")
+        return []
+    from recognition.detectors import create_detector
+
+    images, source = load_frames(args.dataset, args.images)
+    detector = create_detector("haar")
+    faces = []
+    for image in images:
+        boxes = detector(image)
+        if not boxes:
+            # No face found (e.g. synthetic frames): encode the centre of the image
+            height, width = image.shape[:2]
+            boxes = [(height // 4, 3 * width // 4, 3 * height // 4, width // 4)]
+        faces.append((image, boxes[:1]))
+    position = iter(range(10 ** 9))
+
+    def encode():
+        image, boxes = faces[next(position) % len(faces)]
+        face_recognition.face_encodings(image, boxes)
+
+    return [dict(case="encoding/face", source=source, images=len(faces),
+                 **measure(encode, repeat=max(len(faces), args.repeat)))]
+
+
+def bench_matching(args):
+    """Latency of identifying a frame's faces (``--batch`` queries) against synthetic galleries."""
+    from benchmarks.index_recall import synthetic_gallery
+    from recognition.matcher import FaceMatcher
+
+    rng = np.random.default_rng(1)
+    results = []
+    for size in args.gallery_sizes:
+        gallery = synthetic_gallery(size)
+        names = [f"person_{i % max(1, size // 50)}" for i in range(size)]
+        picks = rng.choice(size, 200, replace=size < 200)
+        queries = gallery[picks] + rng.normal(scale=0.02, size=(len(picks), 128)).astype(np.float32)
+        for index in args.indexes:
+            start = time.perf_counter()
+            matcher = FaceMatcher(gallery, names, threshold=0.6, index=index)
+            build_s = time.perf_counter() - start
+            position = iter(range(10 ** 9))
+
+            def identify():
+                i = next(position) * args.batch % len(queries)
+                matcher.identify(queries[i:i + args.batch])
+
+            results.append(dict(case=f"matching/{index}/{size}", gallery=size, batch=args.batch,
+                                build_s=round(build_s, 3), **measure(identify, repeat=args.repeat)))
+    return results
+
+
+def bench_persistence(args):
+    """Throughput of CaptureWriter bulk inserts of captured faces.
+
+    Rows are added to captured_face, so only point --database at a
+    scratch database.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.blobstore import BlobStore
+    from app.extensions import db
+    from recognition.persistence import CaptureWriter
+
+    database = args.database or f"sqlite:///{os.path.join(args.workdir, 'persistence.db')}"
+    engine = create_engine(database)
+    db.metadata.create_all(engine, tables=[db.metadata.tables["recognized_person"],
+                                           db.metadata.tables["captured_face"]])
+    session_factory = sessionmaker(bind=engine)
+    # Rows as the door monitor queues them: the image is already in the blob store
+    stored = BlobStore(os.path.join(args.workdir, "blobs")).put(
+        cv2.imencode(".jpg", synthetic_frames(1)[0][:160, :160])[1].tobytes())
+    image = dict(image_hash=stored.digest, image_size=stored.size, width=stored.width, height=stored.height)
+    results = []
+    for batch_size in args.persistence_batch_sizes:
+        writer = CaptureWriter(session_factory, batch_size=batch_size, flush_interval=0.05,
+                               max_queue=args.rows,
+                               journal_path=os.path.join(args.workdir, "persistence.journal"))
+        rows = [dict(name=f"person_{i % 50}", capture_date=SEED_START + timedelta(seconds=i),
+                     image_format="JPEG", confidence=0.5, recognized_person_id=None, **image)
+                for i in range(args.rows)]
+        start = time.perf_counter()
+        writer.start()
+        for row in rows:
+            writer.submit(row)
+        writer.stop(timeout=300)
+        elapsed = time.perf_counter() - start
+        results.append(dict(case=f"persistence/batch{batch_size}", database=engine.dialect.name,
+                            rows=writer.flushed, seconds=round(elapsed, 3),
+                            rows_per_s=round(writer.flushed / elapsed, 1),
+                            last_flush_ms=writer.stats()["last_flush_latency_ms"]))
+    engine.dispose()
+    return results
+
+
+def seed_app(app, people, faces):
+    """Fill the app's database with people and captured faces whose images are in the blob store."""
+    from app.blobstore import BlobStore, set_image
+    from app.extensions import db
+    from app.models import RecognizedPerson, PersonImage, CapturedFace
+
+    store = BlobStore(app.config["BLOB_DIR"])
+    frames = synthetic_frames(20)
+    images = [cv2.imencode(".jpg", cv2.cvtColor(f, cv2.COLOR_RGB2BGR))[1].tobytes() for f in frames]
+    with app.app_context():
+        person_ids = []
+        for i in range(people):
+            person = RecognizedPerson(name=f"person_{i}", title="Staff")
+            db.session.add(person)
+            db.session.flush()
+            image = PersonImage(person_id=person.id, is_main=True)
+            set_image(image, images[i % len(images)], store)
+            db.session.add(image)
+            person_ids.append(person.id)
+        for i in range(faces):
+            face = CapturedFace(name=f"person_{i % people}" if i % 3 else "Unknown",
+                                capture_date=SEED_START + timedelta(minutes=i), confidence=0.5,
+                                recognized_person_id=person_ids[i % people] if i % 3 else None)
+            set_image(face, images[i % len(images)], store)
+            db.session.add(face)
+        db.session.commit()
+        return db.session.query(db.func.max(CapturedFace.id)).scalar()
+
+
+def bench_web(args):
+    """Latency of the dashboard and image endpoints through the Flask test client."""
+    os.environ["ENCODE_ON_UPLOAD"] = "0"
+    from app import create_app
+
+    app = create_app("testing")
+    app.config.update(LOGIN_DISABLED=True, BLOB_DIR=os.path.join(args.workdir, "blobs"),
+                      THUMBNAIL_DIR=os.path.join(args.workdir, "thumbnails"))
+    last_id = seed_app(app, args.people, args.faces)
+    middle = f"{(SEED_START + timedelta(minutes=args.faces // 2)).isoformat()}_{last_id - args.faces // 2}"
+    client = app.test_client()
+
+    def get(url, status=200, **kwargs):
+        def request():
+            response = client.get(url, **kwargs)
+            assert response.status_code == status, f"{url}: {response.status_code}"
+            response.close()
+        return request
+
+    etag = client.get(f"/image/{last_id}").headers["ETag"]
+    cases = {
+        "web/index": get("/"),
+        "web/index_filtered": get("/?person_filter=person_7"),
+        "web/index_deep_page": get(f"/?after={middle}"),
+        "web/serve_image": get(f"/image/{last_id}"),
+        "web/serve_image_thumb": get(f"/image/{last_id}?size=thumb"),
+        "web/serve_image_304": get(f"/image/{last_id}", status=304, headers={"If-None-Match": etag}),
+        "web/serve_person_image": get("/image/1?table=recognized"),
+    }
+    return [dict(case=name, people=args.people, faces=args.faces, **measure(fn, repeat=args.repeat))
+            for name, fn in cases.items()]
+
+
+def environment():
+    """Describe the machine and code the results were measured on."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+def compare(report, baseline):
+    """Print the change in median latency (or throughput) of every case also in ``baseline``."""
+    changed = sorted(key for key, value in report["arguments"].items()
+                     if key not in ("output", "compare") and baseline["arguments"].get(key) != value)
+    if changed:
+        print(f"[WARNING] Runs used different settings ({', '.join(changed)}); results may not be comparable")
+    results = report["results"]
+    previous = {r["case"]: r for r in baseline["results"]}
+    print(f"{'case':<34}{'before':>12}{'after':>12}{'change':>9}")
+    for r in results:
+        old = previous.get(r["case"])
+        metric = "median_ms" if "median_ms" in r else "rows_per_s"
+        if not old or not old.get(metric):
+            continue
+        change = 100 * (r[metric] - old[metric]) / old[metric]
+        unit = "ms" if metric == "median_ms" else "/s"
+        print(f"{r['case']:<34}{old[metric]:>10.2f}{unit}{r[metric]:>10.2f}{unit}{change:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per case")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--images", type=int, default=20, help="dataset images used (synthetic if none)")
+    parser.add_argument("--backends", nargs="+", default=["haar", "hog"])
+    parser.add_argument("--detection-repeat", type=int, default=3)
+    parser.add_argument("--gallery-sizes", type=int, nargs="+", default=GALLERY_SIZES)
+    parser.add_argument("--indexes", nargs="+", default=["exact", "ivf"])
+    parser.add_argument("--batch", type=int, default=4, help="faces matched per call (faces per frame)")
+    parser.add_argument("--database", help="SQLAlchemy URL of a scratch database for persistence "
+                                           "(default: a temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=2000, help="captured faces written per persistence case")
+    parser.add_argument("--persistence-batch-sizes", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--people", type=int, default=200, help="people seeded for the web cases")
+    parser.add_argument("--faces", type=int, default=5000, help="captured faces seeded for the web cases")
+    args = parser.parse_args()
+
+    suites = {"detection": bench_detection, "encoding": bench_encoding, "matching": bench_matching,
+              "persistence": bench_persistence, "web": bench_web}
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        # Progress and the code's own logging go to stderr, so stdout is only the report
+        with contextlib.redirect_stdout(sys.stderr):
+            for suite in args.suites:
+                start = time.perf_counter()
+                suite_results = suites[suite](args)
+                print(f"[INFO] {suite}: {len(suite_results)} cases in {time.perf_counter() - start:.1f} s")
+                results += suite_results
+
+    report = {"environment": environment(), "arguments": {k: v for k, v in vars(args).items() if k != "workdir"},
+              "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    elif not args.output:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Convert a legacy encodings.pickle into the binary gallery format.
+
+    python convert_gallery.py encodings.pickle encodings.gallery
+"""
+import argparse
+import time
+
+from recognition import Gallery, load_gallery
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert encodings.pickle to a gallery file.")
+    ap.add_argument("source", nargs="?", default="encodings.pickle")
+    ap.add_argument("target", nargs="?", default="encodings.gallery")
+    args = ap.parse_args()
+
+    print(f"[INFO] Reading {args.source}...")
+    gallery = load_gallery(args.source, allow_pickle=True)
+    gallery.save(args.target)
+
+    # Read the result back with full checksum verification
+    start = time.perf_counter()
+    converted = Gallery.load(args.target, verify=True)
+    elapsed = 1000 * (time.perf_counter() - start)
+    print(f"[INFO] Wrote {args.target}: {len(converted)} encodings, "
+          f"{len(set(converted.names))} people (verified load in {elapsed:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
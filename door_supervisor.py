@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+from recognition import RoundRobinQueue
+from door_monitor import create_recognizer, create_camera, create_stages, create_preview, print_stats
+from door_monitor import DETECT_QUEUE_SIZE, ENCODE_QUEUE_SIZE, PERSIST_QUEUE_SIZE, PREVIEW_PORT
+
+# === Config ===
+CAMERAS_FILE = os.environ.get("CAMERAS_FILE", "cameras.json")  # See cameras.example.json
+DETECT_WORKERS = max(2, (os.cpu_count() or 2) // 2)  # Detection threads shared by all cameras
+ENCODE_WORKERS = max(2, (os.cpu_count() or 2) // 2)  # Encoding threads shared by all cameras
+STATUS_INTERVAL = 60.0  # Seconds between camera status reports
+
+
+def load_cameras(path):
+    """Read the camera list: a JSON list of {"id": ..., "source": ...} objects.
+
+    Any other key of an entry overrides the door_monitor.py setting of the
+    same name for that camera, e.g. "motion_threshold" or "tracking".
+    """
+    with open(path) as f:
+        cameras = json.load(f)
+    ids = [camera["id"] for camera in cameras]
+    if len(set(ids)) != len(ids):
+        raise ValueError("camera ids must be unique")
+    return cameras
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the door monitor on many cameras in one process.")
+    ap.add_argument("--cameras", default=CAMERAS_FILE,
+                    help="JSON camera list (default: $CAMERAS_FILE or cameras.json)")
+    ap.add_argument("--detect-workers", type=int, default=DETECT_WORKERS,
+                    help="detection threads shared by all cameras")
+    ap.add_argument("--encode-workers", type=int, default=ENCODE_WORKERS,
+                    help="encoding threads shared by all cameras")
+    ap.add_argument("--preview-port", type=int, default=PREVIEW_PORT,
+                    help="serve MJPEG previews of every camera on this port, on demand")
+    args = ap.parse_args()
+
+    try:
+        camera_list = load_cameras(args.cameras)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[ERROR] Could not load cameras from {args.cameras}: {e}")
+        exit(1)
+    if not camera_list:
+        print(f"[ERROR] No cameras in {args.cameras}.")
+        exit(1)
+
+    # One gallery, one matcher, one detector and one database writer for every camera
+    recognizer = create_recognizer()
+
+    # Queues are shared too; the detect and encode queues hold frames per camera
+    # and hand them out in turn, so a busy door cannot push every other door's
+    # frames out or make them wait behind its own
+    detect_queue = RoundRobinQueue(DETECT_QUEUE_SIZE)
+    encode_queue = RoundRobinQueue(ENCODE_QUEUE_SIZE)
+    persist_queue = queue.Queue(max(PERSIST_QUEUE_SIZE, 2 * len(camera_list)))  # Blocks, never drops faces
+    queues = dict(detect=detect_queue, encode=encode_queue)
+
+    cameras = []
+    for entry in camera_list:
+        options = dict(entry)
+        camera_id, source = options.pop("id"), options.pop("source")
+        cameras.append(create_camera(camera_id, source, detect_queue, **options))
+    stages = create_stages(recognizer, detect_queue, encode_queue, persist_queue,
+                           detect_workers=args.detect_workers, encode_workers=args.encode_workers)
+    preview = create_preview(cameras, args.preview_port) if args.preview_port else None
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    print(f"[INFO] Starting {len(cameras)} cameras...")
+    try:
+        recognizer.gallery_watcher.start()
+        recognizer.capture_writer.start()
+        for stage in stages:
+            stage.start()
+        # Capture runs on one lightweight thread per camera; there is no display
+        for camera in cameras:
+            camera.start()
+        if preview:
+            preview.start()
+
+        while not stop.wait(STATUS_INTERVAL):
+            connected = sum(camera.connected for camera in cameras)
+            print(f"[INFO] {connected}/{len(cameras)} cameras connected")
+            for camera in cameras:
+                print("[INFO] Camera {}".format(camera.summary()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if preview:
+            preview.stop()
+        for camera in cameras:
+            camera.stop()
+        recognizer.gallery_watcher.stop()
+        for stage in stages:
+            stage.stop()
+        recognizer.capture_writer.stop()  # Flushes faces still queued
+        if preview:
+            print("[INFO] Preview: {}".format(preview.summary()))
+        print_stats(recognizer, cameras, [camera.stage for camera in cameras] + stages, queues)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""add captured face and person name indexes
+
+Tables are created by db.create_all() in create_app(), which also creates
+the indexes declared on the models for new databases. This revision adds
+them to databases created before they were declared, so every index is
+only created when missing. On PostgreSQL the indexes are built
+concurrently, and a pg_trgm GIN index is added for substring search on
+captured_face.name.
+
+Revision ID: 4b7e2c91d0a3
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c91d0a3'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_captured_face_capture_date', 'captured_face', ['capture_date', 'id']),
+    ('ix_captured_face_recognized_person_id', 'captured_face', ['recognized_person_id', 'capture_date', 'id']),
+    ('ix_captured_face_name', 'captured_face', ['name']),
+    ('ix_recognized_person_name', 'recognized_person', ['name']),
+]
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for table in ('captured_face', 'recognized_person')
+            for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Built concurrently so the monitors can keep inserting faces meanwhile
+        with op.get_context().autocommit_block():
+            op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for name, table, columns in INDEXES:
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({", ".join(columns)})')
+            op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_captured_face_name_trgm '
+                       'ON captured_face USING gin (name gin_trgm_ops)')
+        return
+
+    existing = _existing_indexes()
+    for name, table, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_captured_face_name_trgm')
+
+    existing = _existing_indexes()
+    for name, table, _ in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name=table)
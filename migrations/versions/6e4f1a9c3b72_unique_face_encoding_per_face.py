@@ -0,0 +1,42 @@
+"""make face encodings unique per image and face
+
+Two encoders working on the same image at once (several web processes, or
+flask encode-images next to the app) could each store its faces. Duplicate
+rows are removed, keeping the oldest of each (image_id, face_index), and a
+unique constraint keeps it that way. db.create_all() creates the
+constraint on new databases, so it is only added when missing.
+
+Revision ID: 6e4f1a9c3b72
+Revises: d3a8f0b61c27
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e4f1a9c3b72'
+down_revision = 'd3a8f0b61c27'
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = 'uq_face_encoding_image_id_face_index'
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if CONSTRAINT in {c['name'] for c in inspector.get_unique_constraints('face_encoding')}:
+        return
+    op.execute('DELETE FROM face_encoding WHERE id NOT IN ('
+               'SELECT keep.id FROM (SELECT MIN(id) AS id FROM face_encoding '
+               'GROUP BY image_id, face_index) AS keep)')
+    with op.batch_alter_table('face_encoding') as batch_op:
+        batch_op.create_unique_constraint(CONSTRAINT, ['image_id', 'face_index'])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if CONSTRAINT in {c['name'] for c in inspector.get_unique_constraints('face_encoding')}:
+        with op.batch_alter_table('face_encoding') as batch_op:
+            batch_op.drop_constraint(CONSTRAINT, type_='unique')
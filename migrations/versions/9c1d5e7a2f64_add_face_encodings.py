@@ -0,0 +1,50 @@
+"""add face encodings of person images
+
+Adds the face_encoding table filled by the background encoder and the
+person_image.faces column marking encoded images. db.create_all() creates
+both on new databases, so each is only added when missing. Existing images
+are encoded by ``flask encode-images`` or when the app next starts.
+
+Revision ID: 9c1d5e7a2f64
+Revises: 4b7e2c91d0a3
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1d5e7a2f64'
+down_revision = '4b7e2c91d0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'faces' not in {column['name'] for column in inspector.get_columns('person_image')}:
+        op.add_column('person_image', sa.Column('faces', sa.Integer(), nullable=True))
+    if not inspector.has_table('face_encoding'):
+        op.create_table(
+            'face_encoding',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('image_id', sa.Integer(), nullable=False),
+            sa.Column('face_index', sa.Integer(), nullable=False),
+            sa.Column('encoding', sa.LargeBinary(), nullable=False),
+            sa.Column('detector', sa.String(length=20), nullable=True),
+            sa.Column('date_added', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['image_id'], ['person_image.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_face_encoding_image_id', 'face_encoding', ['image_id'])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('face_encoding'):
+        op.drop_index('ix_face_encoding_image_id', table_name='face_encoding')
+        op.drop_table('face_encoding')
+    if 'faces' in {column['name'] for column in inspector.get_columns('person_image')}:
+        with op.batch_alter_table('person_image') as batch_op:
+            batch_op.drop_column('faces')
@@ -0,0 +1,62 @@
+"""add blob store columns to person and captured face images
+
+Adds the hash, size and dimensions of the image file in the blob store
+(app/blobstore.py) to person_image and captured_face, and makes
+person_image.image_data nullable. The images themselves are moved out of
+the tables by ``flask migrate-blobs``, which needs BLOB_DIR and can run
+while the app is serving; until then they are served from image_data.
+
+Revision ID: d3a8f0b61c27
+Revises: 9c1d5e7a2f64
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f0b61c27'
+down_revision = '9c1d5e7a2f64'
+branch_labels = None
+depends_on = None
+
+TABLES = ('person_image', 'captured_face')
+COLUMNS = [
+    ('image_hash', sa.String(length=64)),
+    ('image_size', sa.Integer()),
+    ('width', sa.Integer()),
+    ('height', sa.Integer()),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        indexes = {index['name'] for index in inspector.get_indexes(table)}
+        with op.batch_alter_table(table) as batch_op:
+            for name, type_ in COLUMNS:
+                if name not in existing:
+                    batch_op.add_column(sa.Column(name, type_, nullable=True))
+            if table == 'person_image':
+                batch_op.alter_column('image_data', existing_type=sa.LargeBinary(), nullable=True)
+        if f'ix_{table}_image_hash' not in indexes:
+            op.create_index(f'ix_{table}_image_hash', table, ['image_hash'])
+
+
+def downgrade():
+    # Images already moved to the blob store are not copied back; run this
+    # only before flask migrate-blobs or after restoring image_data.
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        indexes = {index['name'] for index in inspector.get_indexes(table)}
+        if f'ix_{table}_image_hash' in indexes:
+            op.drop_index(f'ix_{table}_image_hash', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            for name, _ in reversed(COLUMNS):
+                if name in existing:
+                    batch_op.drop_column(name)
+            if table == 'person_image':
+                batch_op.alter_column('image_data', existing_type=sa.LargeBinary(), nullable=False)
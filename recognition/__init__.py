@@ -0,0 +1,25 @@
+"""
+Recognition components used by the door monitor.
+"""
+from .scheduler import RecognitionScheduler
+from .pipeline import DropOldestQueue, RoundRobinQueue, FrameJob, Stage
+from .matcher import FaceMatcher, Match
+from .index import ExactIndex, IVFIndex, create_index
+from .prototypes import compact_gallery, evaluate_compaction
+from .manifest import TrainingManifest
+from .training import encode_image, encode_image_bytes, encode_images
+from .gallery import Gallery, GalleryError, load_gallery
+from .reload import GalleryWatcher
+from .tracker import FaceTracker, Track
+from .roi import motion_regions, detect_in_regions
+from .detectors import FaceDetector, create_detector
+from .monitor import Camera, Recognizer
+from .preview import PreviewServer, annotate
+
+__all__ = ['RecognitionScheduler', 'DropOldestQueue', 'RoundRobinQueue', 'FrameJob', 'Stage',
+           'FaceMatcher', 'Match', 'ExactIndex', 'IVFIndex', 'create_index',
+           'compact_gallery', 'evaluate_compaction', 'TrainingManifest',
+           'encode_image', 'encode_image_bytes', 'encode_images', 'Gallery', 'GalleryError', 'load_gallery',
+           'GalleryWatcher', 'FaceTracker', 'Track',
+           'motion_regions', 'detect_in_regions', 'FaceDetector', 'create_detector',
+           'Camera', 'Recognizer', 'PreviewServer', 'annotate']
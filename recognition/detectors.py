@@ -0,0 +1,209 @@
+"""
+Interchangeable face detector backends.
+
+Every detector is a callable taking an RGB image and returning
+``(top, right, bottom, left)`` boxes, the convention of
+``face_recognition.face_locations``. All backends accept ``scale``, a
+resize factor applied to the image before detection; boxes are mapped
+back to the input image. OpenCV models are created per thread, because
+cascade classifiers and DNN nets must not be shared between threads.
+
+Backends:
+
+- ``hog``: dlib HOG (``face_recognition``), ``upsample`` times upsampled
+- ``cnn``: dlib CNN (``face_recognition``), slow without a GPU
+- ``haar``: OpenCV Haar cascade, fastest and least accurate
+- ``dnn``: OpenCV DNN, either a YuNet ONNX model or the res10 SSD Caffe model
+- ``haar+hog``: Haar first pass, HOG confirmation on the candidate regions
+"""
+import os
+import threading
+
+import cv2
+
+from .roi import detect_in_regions, merge_regions
+
+
+class FaceDetector:
+    """Base class handling input scaling and per-thread model instances."""
+
+    name = None
+
+    def __init__(self, scale=1.0, upsample=0):
+        self.scale = scale
+        self.upsample = upsample
+        self._local = threading.local()
+
+    def model(self):
+        """Return this thread's model instance, creating it on first use."""
+        model = getattr(self._local, "model", None)
+        if model is None:
+            model = self._local.model = self.load_model()
+        return model
+
+    def load_model(self):
+        return None
+
+    def __call__(self, rgb):
+        scale = self.effective_scale
+        image = rgb
+        if scale != 1.0:
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            image = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=interpolation)
+        boxes = self.detect(image)
+        if scale == 1.0:
+            return boxes
+        height, width = rgb.shape[:2]
+        return [(max(0, int(t / scale)), min(width, int(r / scale)),
+                 min(height, int(b / scale)), max(0, int(l / scale))) for (t, r, b, l) in boxes]
+
+    @property
+    def effective_scale(self):
+        """Input scale including upsampling (dlib backends upsample internally)."""
+        return self.scale * 2 ** self.upsample
+
+    def detect(self, rgb):
+        raise NotImplementedError
+
+
+class DlibDetector(FaceDetector):
+    """dlib HOG or CNN detector from ``face_recognition``."""
+
+    def __init__(self, model="hog", scale=1.0, upsample=1):
+        super().__init__(scale=scale, upsample=upsample)
+        self.name = model
+
+    @property
+    def effective_scale(self):
+        return self.scale
+
+    def detect(self, rgb):
+        import face_recognition
+
+        return face_recognition.face_locations(
+            rgb, number_of_times_to_upsample=self.upsample, model=self.name)
+
+
+class HaarDetector(FaceDetector):
+    """OpenCV Haar cascade on the grayscale image."""
+
+    name = "haar"
+
+    def __init__(self, scale=1.0, upsample=0, cascade="haarcascade_frontalface_default.xml",
+                 scale_factor=1.1, min_neighbors=5, min_size=30):
+        super().__init__(scale=scale, upsample=upsample)
+        self.cascade = cascade
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def load_model(self):
+        path = self.cascade
+        if not os.path.exists(path):
+            path = os.path.join(cv2.data.haarcascades, self.cascade)
+        classifier = cv2.CascadeClassifier(path)
+        if classifier.empty():
+            raise ValueError(f"Could not load Haar cascade {self.cascade}")
+        return classifier
+
+    def detect(self, rgb):
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        faces = self.model().detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+            minSize=(self.min_size, self.min_size))
+        return [(int(y), int(x + w), int(y + h), int(x)) for (x, y, w, h) in faces]
+
+
+class DnnDetector(FaceDetector):
+    """OpenCV DNN detector on CPU.
+
+    ``model`` is either a YuNet ``.onnx`` file (run through
+    ``cv2.FaceDetectorYN``) or a res10 SSD ``.caffemodel``, which also needs
+    its ``config`` prototxt.
+    """
+
+    name = "dnn"
+
+    def __init__(self, model="models/face_detection_yunet_2023mar.onnx", config=None,
+                 scale=1.0, upsample=0, confidence=0.6, input_size=300):
+        super().__init__(scale=scale, upsample=upsample)
+        self.model_path = model
+        self.config_path = config
+        self.confidence = confidence
+        self.input_size = input_size
+
+    @property
+    def is_yunet(self):
+        return self.model_path.endswith(".onnx")
+
+    def load_model(self):
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"DNN face model not found: {self.model_path}")
+        if self.is_yunet:
+            return cv2.FaceDetectorYN.create(self.model_path, "", (self.input_size, self.input_size),
+                                             self.confidence)
+        return cv2.dnn.readNetFromCaffe(self.config_path, self.model_path)
+
+    def detect(self, rgb):
+        height, width = rgb.shape[:2]
+        bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+        if self.is_yunet:
+            detector = self.model()
+            detector.setInputSize((width, height))
+            _, faces = detector.detect(bgr)
+            rects = [] if faces is None else [face[:4] for face in faces]
+        else:
+            net = self.model()
+            blob = cv2.dnn.blobFromImage(cv2.resize(bgr, (self.input_size, self.input_size)),
+                                         1.0, (self.input_size, self.input_size), (104.0, 177.0, 123.0))
+            net.setInput(blob)
+            detections = net.forward()[0, 0]
+            detections = detections[detections[:, 2] >= self.confidence]
+            rects = [(x1 * width, y1 * height, (x2 - x1) * width, (y2 - y1) * height)
+                     for (x1, y1, x2, y2) in detections[:, 3:7]]
+        boxes = []
+        for (x, y, w, h) in rects:
+            boxes.append((max(0, int(y)), min(width, int(x + w)), min(height, int(y + h)), max(0, int(x))))
+        return boxes
+
+
+class CascadeDetector(FaceDetector):
+    """Fast first pass that proposes regions, confirmed by an accurate detector.
+
+    The accurate detector only runs on the first pass's boxes, grown by
+    ``padding`` times their size.
+    """
+
+    def __init__(self, first=None, second=None, padding=0.5, scale=1.0):
+        super().__init__(scale=scale)
+        self.first = first or HaarDetector(min_neighbors=3)
+        self.second = second or DlibDetector("hog")
+        self.padding = padding
+        self.name = f"{self.first.name}+{self.second.name}"
+
+    def detect(self, rgb):
+        height, width = rgb.shape[:2]
+        regions = []
+        for (t, r, b, l) in self.first(rgb):
+            pad = int(self.padding * max(b - t, r - l))
+            regions.append((max(0, t - pad), min(width, r + pad), min(height, b + pad), max(0, l - pad)))
+        return detect_in_regions(rgb, merge_regions(regions), self.second)[0]
+
+
+DETECTORS = {
+    'hog': lambda **options: DlibDetector("hog", **options),
+    'cnn': lambda **options: DlibDetector("cnn", **options),
+    'haar': HaarDetector,
+    'dnn': DnnDetector,
+    'haar+hog': CascadeDetector,
+}
+
+
+def create_detector(backend="hog", **options):
+    """Create the detector backend named ``backend`` with backend-specific options."""
+    try:
+        factory = DETECTORS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown detector '{backend}'. Available: {', '.join(sorted(DETECTORS))}")
+    return factory(**options)
+
@@ -0,0 +1,142 @@
+"""
+Versioned binary gallery format for known face encodings.
+
+Layout of a gallery file::
+
+    header    64 bytes, see HEADER_FORMAT
+    metadata  UTF-8 JSON: names, person_ids, paths, prototype names, radii
+    padding   up to a 64-byte boundary
+    data      float32 encodings (count x dim), then float32 prototypes
+
+The data section is memory-mapped read-only on load, so many monitor
+processes share one copy of the encodings through the page cache. CRC32
+checksums of the metadata and data sections are stored in the header. The
+metadata checksum is checked on every load. The data checksum is checked
+on request, because it means reading the whole matrix.
+"""
+import json
+import os
+import pickle
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b"FRGALLRY"
+FORMAT_VERSION = 1
+HEADER_FORMAT = "<8sHHIIIIIQQQ"
+HEADER_SIZE = 64
+ALIGNMENT = 64
+
+
+class GalleryError(Exception):
+    """Raised when a gallery file is missing, corrupt or of an unknown version."""
+
+
+class Gallery:
+    """Known face encodings with their names, person ids and source paths."""
+
+    def __init__(self, encodings, names, person_ids=None, paths=None, prototypes=None,
+                 prototype_names=None, radii=None, generation=0):
+        self.encodings = np.asarray(encodings, dtype=np.float32).reshape(len(names), -1) \
+            if len(names) else np.zeros((0, 128), dtype=np.float32)
+        self.names = list(names)
+        if person_ids is None:
+            person_ids = [-1] * len(self.names)
+        self.person_ids = np.asarray(person_ids, dtype=np.int64)
+        self.paths = list(paths) if paths is not None else [""] * len(self.names)
+        self.prototypes = None
+        self.prototype_names = []
+        if prototypes is not None and len(prototypes):
+            self.prototypes = np.asarray(prototypes, dtype=np.float32).reshape(len(prototype_names), -1)
+            self.prototype_names = list(prototype_names)
+        self.radii = dict(radii or {})
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a gallery from the dict stored in a legacy ``encodings.pickle``."""
+        return cls(data["encodings"], data["names"], person_ids=data.get("person_ids"),
+                   paths=data.get("paths"), prototypes=data.get("prototypes"),
+                   prototype_names=data.get("prototype_names"), radii=data.get("radii"))
+
+    def save(self, path):
+        """Write the gallery atomically, bumping its generation number."""
+        self.generation += 1
+        metadata = json.dumps({
+            "names": self.names,
+            "person_ids": self.person_ids.tolist(),
+            "paths": self.paths,
+            "prototype_names": self.prototype_names,
+            "radii": self.radii,
+            "generation": self.generation,
+        }).encode("utf-8")
+        dim = self.encodings.shape[1]
+        data = np.ascontiguousarray(self.encodings, dtype=np.float32).tobytes()
+        if self.prototypes is not None:
+            data += np.ascontiguousarray(self.prototypes, dtype=np.float32).tobytes()
+        data_offset = -(-(HEADER_SIZE + len(metadata)) // ALIGNMENT) * ALIGNMENT
+        header = struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, 0, dim, len(self.names),
+                             len(self.prototype_names), zlib.crc32(metadata), zlib.crc32(data),
+                             HEADER_SIZE, len(metadata), data_offset)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(metadata)
+            f.write(b"\0" * (data_offset - HEADER_SIZE - len(metadata)))
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap=True, verify=False):
+        """Load a gallery file, memory-mapping the encodings unless ``mmap`` is False."""
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+                raise GalleryError(f"{path} is not a gallery file")
+            (_, version, _, dim, count, prototype_count, meta_crc, data_crc,
+             meta_offset, meta_length, data_offset) = struct.unpack_from(HEADER_FORMAT, header)
+            if version != FORMAT_VERSION:
+                raise GalleryError(f"{path} has unsupported gallery version {version}")
+            f.seek(meta_offset)
+            metadata = f.read(meta_length)
+        if zlib.crc32(metadata) != meta_crc:
+            raise GalleryError(f"{path} metadata checksum mismatch")
+        meta = json.loads(metadata.decode("utf-8"))
+
+        rows = count + prototype_count
+        if os.path.getsize(path) < data_offset + rows * dim * 4:
+            raise GalleryError(f"{path} is truncated")
+        if mmap and rows:
+            data = np.memmap(path, dtype=np.float32, mode="r", offset=data_offset, shape=(rows, dim))
+        else:
+            with open(path, "rb") as f:
+                f.seek(data_offset)
+                data = np.frombuffer(f.read(rows * dim * 4), dtype=np.float32).reshape(rows, dim)
+        if verify and zlib.crc32(memoryview(np.ascontiguousarray(data)).cast("B")) != data_crc:
+            raise GalleryError(f"{path} data checksum mismatch")
+
+        return cls(data[:count], meta["names"], person_ids=meta["person_ids"],
+                   paths=meta["paths"], prototypes=data[count:] if prototype_count else None,
+                   prototype_names=meta["prototype_names"], radii=meta["radii"],
+                   generation=meta["generation"])
+
+
+def load_gallery(path, allow_pickle=False, **options):
+    """Load a gallery file, or a legacy ``encodings.pickle`` if ``allow_pickle`` is set.
+
+    Unpickling can run arbitrary code, so legacy files are refused unless the
+    caller trusts them explicitly.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:
+        return Gallery.load(path, **options)
+    if not allow_pickle:
+        raise GalleryError(f"{path} is not a gallery file; convert it with convert_gallery.py")
+    with open(path, "rb") as f:
+        return Gallery.from_dict(pickle.load(f))
@@ -0,0 +1,158 @@
+"""
+Nearest-neighbour index backends for face encoding matching.
+
+``ExactIndex`` scans every gallery row and is the default. ``IVFIndex`` is an
+inverted-file index for large galleries: rows are bucketed by their nearest
+k-means centroid and a query only scans the ``n_probe`` closest buckets.
+"""
+import numpy as np
+
+
+def squared_distances(queries, matrix, sq_norms=None):
+    """Return the (queries x rows) matrix of squared Euclidean distances."""
+    if sq_norms is None:
+        sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+    sq_dist = queries @ matrix.T
+    sq_dist *= -2.0
+    sq_dist += sq_norms
+    sq_dist += np.einsum('ij,ij->i', queries, queries)[:, None]
+    np.maximum(sq_dist, 0.0, out=sq_dist)
+    return sq_dist
+
+
+def _top_k(sq_dist, k):
+    """Return (distances, columns) of the k smallest entries of every row, nearest first."""
+    k = min(k, sq_dist.shape[1])
+    if k < sq_dist.shape[1]:
+        columns = np.argpartition(sq_dist, k - 1, axis=1)[:, :k]
+    else:
+        columns = np.broadcast_to(np.arange(sq_dist.shape[1]), sq_dist.shape)
+    rows = np.arange(sq_dist.shape[0])[:, None]
+    order = np.argsort(sq_dist[rows, columns], axis=1)
+    columns = columns[rows, order]
+    return np.sqrt(sq_dist[rows, columns]), columns
+
+
+class ExactIndex:
+    """Brute-force index that compares every query with every gallery row."""
+
+    def __init__(self, encodings):
+        self.encodings = encodings
+        self.sq_norms = np.einsum('ij,ij->i', encodings, encodings)
+
+    def __len__(self):
+        return self.encodings.shape[0]
+
+    def search(self, queries, k=1):
+        """Return ``(distances, indices)`` arrays of shape (queries, k), nearest first."""
+        return _top_k(squared_distances(queries, self.encodings, self.sq_norms), k)
+
+
+class IVFIndex:
+    """Inverted-file index over k-means buckets of the gallery.
+
+    Rows are stored grouped by bucket so every bucket is a contiguous slice
+    of one matrix. Recall against the exact index is governed by
+    ``n_probe``; see ``benchmarks/index_recall.py``.
+    """
+
+    def __init__(self, encodings, n_lists=None, n_probe=8, iterations=10,
+                 sample_size=None, seed=0):
+        n = encodings.shape[0]
+        if n == 0:
+            self.n_lists = self.n_probe = 0
+            self.centroids = encodings[:0].copy()
+            self.ids = np.zeros(0, dtype=np.int64)
+            self.encodings = self.centroids
+            self.sq_norms = np.zeros(0, dtype=encodings.dtype)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            return
+        if n_lists is None:
+            n_lists = int(np.sqrt(n))
+        self.n_lists = max(1, min(int(n_lists), n))
+        self.n_probe = max(1, min(int(n_probe), self.n_lists))
+        if sample_size is None:
+            sample_size = 64 * self.n_lists
+
+        rng = np.random.default_rng(seed)
+        self.centroids = self._train(encodings, sample_size, iterations, rng)
+        assignments = self._assign(encodings)
+
+        order = np.argsort(assignments, kind='stable')
+        self.ids = order.astype(np.int64)
+        self.encodings = np.ascontiguousarray(encodings[order])
+        self.sq_norms = np.einsum('ij,ij->i', self.encodings, self.encodings)
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self):
+        return self.encodings.shape[0]
+
+    def _assign(self, encodings, chunk=8192):
+        """Return the index of the nearest centroid for every row."""
+        centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        assignments = np.empty(encodings.shape[0], dtype=np.int64)
+        for start in range(0, encodings.shape[0], chunk):
+            block = encodings[start:start + chunk]
+            assignments[start:start + chunk] = np.argmin(
+                squared_distances(block, self.centroids, centroid_norms), axis=1)
+        return assignments
+
+    def _train(self, encodings, sample_size, iterations, rng):
+        """Run Lloyd's k-means on a sample of the gallery."""
+        n = encodings.shape[0]
+        if n > sample_size:
+            sample = encodings[rng.choice(n, sample_size, replace=False)]
+        else:
+            sample = encodings
+        self.centroids = sample[rng.choice(sample.shape[0], self.n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=self.n_lists)
+            filled = counts > 0
+            self.centroids[filled] = sums[filled] / counts[filled, None]
+            # Re-seed empty buckets from random sample rows
+            empty = np.flatnonzero(~filled)
+            if empty.size:
+                self.centroids[empty] = sample[rng.choice(sample.shape[0], empty.size)]
+        return self.centroids
+
+    def search(self, queries, k=1):
+        """Return ``(distances, indices)`` arrays of shape (queries, k), nearest first.
+
+        Rows are padded with ``inf`` distance and index -1 when the probed
+        buckets hold fewer than ``k`` rows.
+        """
+        k = min(k, len(self))
+        distances = np.full((queries.shape[0], k), np.inf, dtype=np.float32)
+        indices = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        if not len(self):
+            return distances, indices
+        probes = _top_k(squared_distances(queries, self.centroids), self.n_probe)[1]
+        for q, lists in enumerate(probes):
+            rows = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+            if not rows.size:
+                continue
+            sq_dist = squared_distances(queries[q:q + 1], self.encodings[rows], self.sq_norms[rows])
+            found, columns = _top_k(sq_dist, k)
+            distances[q, :found.shape[1]] = found[0]
+            indices[q, :found.shape[1]] = self.ids[rows[columns[0]]]
+        return distances, indices
+
+
+INDEX_BACKENDS = {
+    'exact': ExactIndex,
+    'ivf': IVFIndex,
+}
+
+
+def create_index(backend, encodings, **options):
+    """Build the index backend named ``backend`` over a float32 encodings matrix."""
+    try:
+        index_class = INDEX_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown index backend '{backend}'. "
+                         f"Available: {', '.join(sorted(INDEX_BACKENDS))}")
+    return index_class(encodings, **options)
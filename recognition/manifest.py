@@ -0,0 +1,79 @@
+"""
+Manifest of the dataset images already encoded into the gallery.
+"""
+import hashlib
+import json
+import os
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TrainingManifest:
+    """Per-image record of mtime, size and content hash, keyed by path.
+
+    A file whose mtime and size are unchanged is trusted without reading it.
+    Otherwise its content hash decides, so touching or copying a file back
+    in place does not trigger a re-encode.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self._pending = {}
+
+    @classmethod
+    def load(cls, path):
+        """Load a manifest, or return an empty one if the file does not exist."""
+        try:
+            with open(path) as f:
+                return cls(json.load(f).get("images", {}))
+        except FileNotFoundError:
+            return cls()
+
+    def save(self, path):
+        """Write the manifest atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "images": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def diff(self, image_paths):
+        """Split ``image_paths`` into ``(unchanged, changed)`` lists."""
+        unchanged, changed = [], []
+        for path in image_paths:
+            stat = os.stat(path)
+            entry = self.entries.get(path)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                unchanged.append(path)
+                continue
+            digest = file_digest(path)
+            if entry and entry["sha256"] == digest:
+                entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                unchanged.append(path)
+                continue
+            self._pending[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            changed.append(path)
+        return unchanged, changed
+
+    def record(self, path, faces):
+        """Record that ``path`` has been encoded into ``faces`` encodings."""
+        if path in self._pending:
+            mtime_ns, size, digest = self._pending.pop(path)
+        else:
+            stat = os.stat(path)
+            mtime_ns, size, digest = stat.st_mtime_ns, stat.st_size, file_digest(path)
+        self.entries[path] = {"mtime_ns": mtime_ns, "size": size, "sha256": digest, "faces": faces}
+
+    def prune(self, image_paths):
+        """Drop entries for files no longer in ``image_paths``; return the dropped paths."""
+        current = set(image_paths)
+        removed = [path for path in self.entries if path not in current]
+        for path in removed:
+            del self.entries[path]
+        return removed
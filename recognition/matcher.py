@@ -0,0 +1,135 @@
+"""
+Vectorized nearest-neighbour matching of face encodings.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .index import create_index, squared_distances
+
+ENCODING_SIZE = 128
+
+Match = namedtuple('Match', ['name', 'distance', 'index'])
+
+
+class FaceMatcher:
+    """Match face encodings against a gallery of known encodings.
+
+    The gallery is held as one contiguous float32 matrix with an integer name
+    index per row. Nearest neighbours are found by a pluggable index backend
+    (see ``recognition.index``): the exact brute-force scan by default, or an
+    approximate index for very large galleries. Distances are Euclidean, like
+    ``face_recognition.face_distance``, so existing match thresholds keep
+    their meaning.
+
+    When per-person ``prototypes`` are given (see ``recognition.prototypes``),
+    ``identify`` compares faces with the prototypes only. Unless the nearest
+    prototype is closer than ``threshold - refine_margin``, the face is then
+    compared with the full encodings of every person it could match: those
+    with a prototype closer than ``threshold`` plus their radius (the largest
+    distance from their encodings to their nearest prototype, see
+    ``compact_gallery``). People without a radius get ``refine_margin``.
+    """
+
+    def __init__(self, encodings, names, threshold=0.6, index='exact', index_options=None,
+                 prototypes=None, prototype_names=None, refine_margin=0.05, person_ids=None,
+                 radii=None):
+        matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        self.encodings = np.ascontiguousarray(matrix)
+        labels, name_index = np.unique(np.asarray(names, dtype=object), return_inverse=True)
+        self.names = [str(label) for label in labels]
+        self.name_index = name_index.astype(np.int32)
+        self.threshold = threshold
+        # RecognizedPerson ids carried by the gallery (-1 where unknown)
+        self._person_ids = {}
+        if person_ids is not None:
+            for name, person_id in zip(names, person_ids):
+                if person_id >= 0:
+                    self._person_ids.setdefault(name, int(person_id))
+        self.index = create_index(index, self.encodings, **(index_options or {}))
+
+        self.prototypes = None
+        self.refine_margin = refine_margin
+        self.refined = 0
+        if prototypes is not None and len(prototypes):
+            self.prototypes = np.ascontiguousarray(
+                np.asarray(prototypes, dtype=np.float32).reshape(-1, ENCODING_SIZE))
+            self.prototype_names = [str(name) for name in prototype_names]
+            # A face within the threshold of one of a person's encodings is closer than
+            # threshold + radius to one of their prototypes (triangle inequality)
+            radii = radii or {}
+            self._reach = self.threshold + np.array(
+                [radii.get(name, refine_margin) for name in self.prototype_names], dtype=np.float32)
+            # Gallery rows of every person, for refinement near the threshold
+            order = np.argsort(self.name_index, kind='stable')
+            bounds = np.searchsorted(self.name_index[order], np.arange(len(self.names) + 1))
+            self._rows_by_name = {name: order[bounds[i]:bounds[i + 1]]
+                                  for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return self.encodings.shape[0]
+
+    def name_of(self, index):
+        """Return the name of gallery row ``index``."""
+        return self.names[self.name_index[index]]
+
+    def person_id_of(self, name):
+        """Return the ``RecognizedPerson`` id the gallery stores for ``name``, or None."""
+        return self._person_ids.get(name)
+
+    def distances(self, queries):
+        """Return the exact (faces x gallery) matrix of Euclidean distances."""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        return np.sqrt(squared_distances(queries, self.encodings))
+
+    def match(self, queries, k=1):
+        """Return the ``k`` nearest gallery entries for every query, nearest first."""
+        if len(queries) == 0 or not len(self):
+            return [[] for _ in range(len(queries))]
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        distances, indices = self.index.search(queries, k)
+        return [
+            [Match(self.name_of(i), float(d), int(i)) for d, i in zip(row_d, row_i) if i >= 0]
+            for row_d, row_i in zip(distances, indices)
+        ]
+
+    def identify(self, queries):
+        """Return ``(name, confidence, distance)`` for every query.
+
+        Faces whose nearest distance is not below the threshold are reported
+        as "Unknown". Confidence is ``1 - distance``, floored at 0.
+        """
+        if self.prototypes is not None and len(queries):
+            return self._identify_prototypes(queries)
+        results = []
+        for matches in self.match(queries, k=1):
+            if not matches:
+                results.append(("Unknown", 0.0, None))
+                continue
+            best = matches[0]
+            confidence = max(0.0, 1 - best.distance)
+            name = best.name if best.distance < self.threshold else "Unknown"
+            results.append((name, confidence, best.distance))
+        return results
+
+    def _identify_prototypes(self, queries):
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        distances = np.sqrt(squared_distances(queries, self.prototypes))
+        low = self.threshold - self.refine_margin
+        results = []
+        for query, row in zip(queries, distances):
+            best = int(np.argmin(row))
+            name, distance = self.prototype_names[best], float(row[best])
+            candidates = {self.prototype_names[i] for i in np.flatnonzero(row < self._reach)}
+            if distance >= low and candidates:
+                # Not a clear match: compare with every encoding of the people it could be
+                self.refined += 1
+                rows = np.concatenate([self._rows_by_name.get(n, np.zeros(0, np.int64))
+                                       for n in candidates])
+                if rows.size:
+                    exact = np.sqrt(squared_distances(query[None, :], self.encodings[rows]))[0]
+                    nearest = int(np.argmin(exact))
+                    name, distance = self.name_of(rows[nearest]), float(exact[nearest])
+            confidence = max(0.0, 1 - distance)
+            results.append((name if distance < self.threshold else "Unknown", confidence, distance))
+        return results
@@ -0,0 +1,362 @@
+"""
+Camera capture and shared recognition stages of the door monitor.
+
+A :class:`Camera` holds everything that belongs to one stream: the video
+capture and its reconnects, the motion model, the recognition scheduler,
+the face tracker and the latest overlay. A :class:`Recognizer` holds what
+all cameras share: the detector, the gallery watcher and the capture
+writer. Its ``detect``, ``recognize`` and ``save`` methods are the
+functions of the pipeline stages, so any number of cameras can feed one
+pool of detection and encoding workers.
+"""
+import io
+import random
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import cv2
+
+from .pipeline import FrameJob, Stage
+from .roi import detect_in_regions, motion_regions
+from .scheduler import RecognitionScheduler
+
+
+class Camera:
+    """One video stream: capture, motion detection and per-scene state.
+
+    ``capture`` is the function of the camera's source stage (see
+    :meth:`start`). It reads a frame, runs motion detection and queues the
+    frame on ``detect_queue`` when the scheduler decides it needs
+    recognition. It returns the job so the stage can hand every frame to a
+    display queue.
+
+    When the stream cannot be opened or stops delivering frames, the camera
+    reconnects with exponential backoff, from ``reconnect_delay`` up to
+    ``max_reconnect_delay`` seconds, with jitter so cameras behind the same
+    recorder do not reconnect in lockstep.
+    """
+
+    def __init__(self, camera_id, source, detect_queue, scheduler=None, tracker=None,
+                 width=500, min_motion_area=100, motion_threshold=0.01, roi_detection=True,
+                 roi_padding=0.5, predict_tracks=False, reconnect_delay=1.0,
+                 max_reconnect_delay=30.0):
+        self.id = camera_id
+        self.source = source
+        self.detect_queue = detect_queue
+        self.scheduler = scheduler or RecognitionScheduler()
+        self.tracker = tracker
+        self.width = width
+        self.min_motion_area = min_motion_area
+        self.motion_threshold = motion_threshold
+        self.roi_detection = roi_detection
+        self.roi_padding = roi_padding
+        self.predict_tracks = predict_tracks and tracker is not None
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=25,
+                                                                detectShadows=True)
+        self.frames = 0
+        self.reconnects = 0
+        self.last_capture_time = 0  # Time of the last saved face (persist stage only)
+        self.current_name = "unknown"
+        self.stage = None
+        self._frame = (0, None)  # (seq, frame) of the latest frame, for previews
+        self._capture = None
+        self._delay = reconnect_delay
+        self._stop_event = threading.Event()
+        # Latest recognition results, replaced as a whole so the display never sees a partial update
+        self._results_lock = threading.Lock()
+        self._results = (0, [], [])  # (seq, boxes, names)
+
+    @property
+    def connected(self):
+        return self._capture is not None
+
+    def start(self, outbox=None):
+        """Start capturing on a source stage; frames are put on ``outbox`` if given."""
+        self.stage = Stage(f"capture-{self.id}", self.capture, outbox=outbox).start()
+        return self
+
+    def stop(self):
+        """Interrupt a pending reconnect, stop capturing and release the stream."""
+        self._stop_event.set()
+        if self.stage is not None:
+            self.stage.stop()
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+    def _open(self):
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            capture.release()
+            return None
+        # Keep the backend from queueing stale frames when capture falls behind
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return capture
+
+    def _backoff(self):
+        delay = self._delay * random.uniform(0.5, 1.0)
+        self._delay = min(self._delay * 2, self.max_reconnect_delay)
+        self._stop_event.wait(delay)
+
+    def read(self):
+        """Return the next frame, reconnecting as needed; None once stopped."""
+        while not self._stop_event.is_set():
+            if self._capture is None:
+                self._capture = self._open()
+                if self._capture is None:
+                    print(f"[WARNING] Camera {self.id}: could not open stream, retrying")
+                    self._backoff()
+                    continue
+                print(f"[INFO] Camera {self.id}: stream opened")
+            grabbed, frame = self._capture.read()
+            if grabbed and frame is not None:
+                self._delay = self.reconnect_delay
+                return frame
+            print(f"[WARNING] Camera {self.id}: stream lost, reconnecting")
+            self._capture.release()
+            self._capture = None
+            self.reconnects += 1
+            self._backoff()
+        return None
+
+    def latest_frame(self):
+        """Return (seq, frame) of the latest captured frame."""
+        return self._frame
+
+    def results(self):
+        """Return the latest (seq, boxes, names) overlay."""
+        with self._results_lock:
+            return self._results
+
+    def publish(self, job):
+        """Make a job's boxes and names the current overlay unless newer results exist."""
+        with self._results_lock:
+            if job.seq < self._results[0]:
+                return
+            self._results = (job.seq, job.boxes, job.names)
+            for name in job.names:
+                if self.current_name != name:
+                    self.current_name = name
+                    print(f"[INFO] Camera {self.id}: {name}")
+
+    def capture(self):
+        """Grab a frame, run motion detection and decide whether it needs recognition."""
+        frame = self.read()
+        if frame is None:
+            return None
+        self.frames += 1
+        height, width = frame.shape[:2]
+        if width != self.width:
+            frame = cv2.resize(frame, (self.width, int(height * self.width / width)),
+                               interpolation=cv2.INTER_AREA)
+        frame_area = frame.shape[0] * frame.shape[1]
+        self._frame = (self.frames, frame)
+
+        # Motion detection
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (21, 21), 0)  # Reduce noise
+        fg_mask = self.bg_subtractor.apply(gray)
+        _, thresh = cv2.threshold(fg_mask, 25, 255, cv2.THRESH_BINARY)
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        areas = [cv2.contourArea(c) for c in contours]
+        motion_area = sum(a for a in areas if a > self.min_motion_area)
+        motion_detected = motion_area > (self.motion_threshold * frame_area)
+
+        job = FrameJob(seq=self.frames, frame=frame, motion_detected=motion_detected, camera=self)
+        if self.roi_detection and motion_detected:
+            job.regions = motion_regions(contours, frame.shape, self.min_motion_area, self.roi_padding)
+        # Face detection and recognition (on motion, otherwise every Nth frame)
+        job.run_detection = self.scheduler.should_run(motion_detected)
+        if job.run_detection:
+            self.detect_queue.put(job)
+        elif self.predict_tracks:
+            # Follow known faces between detections
+            job.boxes, job.names = self.tracker.predict(frame)
+            if job.boxes:
+                self.publish(job)
+        return job
+
+    def summary(self):
+        """Return a one-line report of this camera's activity."""
+        parts = ["{}: {} frames, {} reconnects, {}".format(
+            self.id, self.frames, self.reconnects, "connected" if self.connected else "disconnected")]
+        parts.append(self.scheduler.summary())
+        if self.tracker:
+            parts.append("{} encodings skipped by tracking".format(self.tracker.encodes_saved))
+        return "; ".join(parts)
+
+
+class Recognizer:
+    """Detection, recognition and saving shared by every camera.
+
+    Per-scene state (tracker, scheduler, overlay, save rate limit) is taken
+    from ``job.camera``; the detector, the current matcher and the capture
+    writer are shared. Without a tracker, each camera saves faces at most
+    once per ``capture_delay`` seconds. With a ``blob_store``, face crops
+    are written to it and rows only reference them; otherwise the rows
+    carry the image bytes.
+    """
+
+    def __init__(self, detector, gallery_watcher, capture_writer, roi_scale=1.0,
+                 roi_max_coverage=0.5, capture_delay=2.0, timezone="Africa/Tunis", blob_store=None):
+        self.detector = detector
+        self.gallery_watcher = gallery_watcher
+        self.capture_writer = capture_writer
+        self.blob_store = blob_store
+        self.roi_scale = roi_scale
+        self.roi_max_coverage = roi_max_coverage
+        self.capture_delay = capture_delay
+        self.timezone = ZoneInfo(timezone)
+        self.detection_pixels = [0, 0]  # Pixels scanned by face detection, pixels of the frames it ran on
+        self._pixels_lock = threading.Lock()
+
+    @property
+    def detection_coverage(self):
+        """Fraction of frame pixels face detection actually scanned."""
+        with self._pixels_lock:
+            scanned, total = self.detection_pixels
+        return scanned / total if total else None
+
+    def detect(self, job):
+        """Locate faces in a frame."""
+        camera = job.camera
+        start = time.perf_counter()
+        job.rgb_frame = cv2.cvtColor(job.frame, cv2.COLOR_BGR2RGB)
+        frame_pixels = job.frame.shape[0] * job.frame.shape[1]
+        region_pixels = sum((b - t) * (r - l) for (t, r, b, l) in job.regions)
+        if job.regions and region_pixels <= self.roi_max_coverage * frame_pixels:
+            # Only look for faces around motion, then map the boxes back to the full frame
+            job.boxes, scanned = detect_in_regions(job.rgb_frame, job.regions, self.detector,
+                                                   self.roi_scale)
+        else:
+            job.boxes = self.detector(job.rgb_frame)
+            scanned = frame_pixels
+        with self._pixels_lock:
+            self.detection_pixels[0] += scanned
+            self.detection_pixels[1] += frame_pixels
+        job.processing_time += time.perf_counter() - start
+        if not job.boxes:
+            if camera.tracker:
+                camera.tracker.update(job.seq, [])
+            camera.scheduler.record(job.processing_time)
+            camera.publish(job)
+            return None
+        print(f"[DEBUG] Camera {camera.id}: detected {len(job.boxes)} "
+              f"face{'s' if len(job.boxes) > 1 else ''}")
+        return job
+
+    def recognize(self, job):
+        """Encode the detected faces and match them against the known encodings."""
+        import face_recognition
+
+        camera = job.camera
+        tracker = camera.tracker
+        start = time.perf_counter()
+        matcher = self.gallery_watcher.matcher  # Read once so the whole frame uses one gallery version
+
+        # Tracked faces reuse their identity; only new, stale or low-confidence tracks are encoded
+        if tracker:
+            tracks = tracker.update(job.seq, job.boxes, frame=job.frame)
+        else:
+            tracks = [(None, True) for _ in job.boxes]
+        to_encode = [i for i, (_, needed) in enumerate(tracks) if needed]
+        job.encodings = face_recognition.face_encodings(job.rgb_frame, [job.boxes[i] for i in to_encode])
+
+        # All faces of the frame are matched in one batched distance computation
+        identities = {}
+        for i, (name, confidence, distance) in zip(to_encode, matcher.identify(job.encodings)):
+            if name != "Unknown":
+                print(f"[MATCH] Camera {camera.id}: recognized {name} (Confidence: {confidence:.2f})")
+            elif distance is not None:
+                print(f"[NO MATCH] Camera {camera.id}: distance {distance:.3f} > {matcher.threshold}")
+            identities[i] = (name, confidence, matcher.person_id_of(name))
+            track = tracks[i][0]
+            if track:
+                tracker.assign(track, job.seq, *identities[i])
+
+        for i, (track, _) in enumerate(tracks):
+            name, confidence, person_id = identities.get(i) or (track.name, track.confidence, track.person_id)
+            job.names.append(name)
+            job.confidences.append(confidence)
+            job.person_ids.append(person_id)
+            job.track_ids.append(track.id if track else None)
+
+        if tracker:
+            # One CapturedFace per visit, while there is motion; save() confirms each claim
+            job.tracks = [track for track, _ in tracks]
+            job.save_indices = []
+            if job.motion_detected:
+                job.save_indices = [i for i, track in enumerate(job.tracks)
+                                    if track is not None and tracker.claim_save(track, job.seq)]
+
+        job.processing_time += time.perf_counter() - start
+        camera.scheduler.record(job.processing_time)
+        camera.publish(job)
+        # Faces are only saved while there is motion
+        if not job.motion_detected or job.save_indices == []:
+            return None
+        return job
+
+    def save(self, job):
+        """Queue the faces of a recognized frame for saving.
+
+        With tracking, each visit is saved once (see FaceTracker.claim_save),
+        and a track only counts as saved once its face is queued. Without it,
+        a camera's faces are saved at most once per ``capture_delay``.
+        """
+        from PIL import Image
+
+        camera = job.camera
+        if job.save_indices is None and time.time() - camera.last_capture_time < self.capture_delay:
+            return None
+        print(f"[INFO] Camera {camera.id}: motion detected, saving face...")
+        for idx, ((top, right, bottom, left), name, confidence, person_id) in enumerate(
+                zip(job.boxes, job.names, job.confidences, job.person_ids)):
+            if job.save_indices is not None and idx not in job.save_indices:
+                continue
+            track = job.tracks[idx] if job.tracks else None
+            queued = False
+            try:
+                img_crop = job.frame[max(0, top):bottom, max(0, left):right]
+                if img_crop.size == 0:
+                    print(f"[WARNING] Empty crop for face {idx}, skipping")
+                    continue
+                pil_img = Image.fromarray(cv2.cvtColor(img_crop, cv2.COLOR_BGR2RGB))
+                img_byte_arr = io.BytesIO()
+                pil_img.save(img_byte_arr, format='JPEG')
+                image_data = img_byte_arr.getvalue()
+                if self.blob_store is not None:
+                    stored = self.blob_store.put(image_data)
+                    image = dict(image_hash=stored.digest, image_size=stored.size,
+                                 width=stored.width, height=stored.height)
+                else:
+                    image = dict(image_data=image_data)
+
+                # person_id comes from the gallery; the writer resolves any missing one from its cache
+                queued = self.capture_writer.submit(dict(
+                    name=name,
+                    capture_date=datetime.fromtimestamp(job.timestamp, self.timezone),
+                    image_format='JPEG',
+                    confidence=float(confidence),
+                    recognized_person_id=person_id,
+                    **image
+                ))
+                if not queued:
+                    print(f"[WARNING] Could not queue or journal face {idx}, dropped")
+                    continue
+                print(f"[INFO] Queued face {idx}: {name} (Confidence: {confidence:.2f})")
+                camera.last_capture_time = time.time()  # Update last capture time
+            except Exception as e:
+                print(f"[ERROR] Failed to save face {idx}: {e}")
+            finally:
+                if track is not None:
+                    if queued:
+                        camera.tracker.mark_saved(track, name)
+                    else:
+                        camera.tracker.release_save(track)  # A later frame saves the face
+        return None
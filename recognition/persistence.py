@@ -0,0 +1,315 @@
+"""
+Background batched persistence of captured faces.
+"""
+import base64
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+
+# Errors worth retrying: the database is down, restarting or unreachable
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError)
+
+
+class PersonCache:
+    """In-memory map of ``RecognizedPerson`` names to ids.
+
+    Loaded once at startup and refreshed when a new gallery is loaded, so
+    saving a recognized face needs no database lookup. When several people
+    share a name, the oldest one (lowest id) wins. It also knows every
+    person id, so ids from an older gallery can be checked before saving.
+    """
+
+    def __init__(self, session_factory):
+        from app.models import RecognizedPerson
+
+        self.recognized_person = RecognizedPerson
+        self.session_factory = session_factory
+        self._ids = {}
+        self._person_ids = set()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def refresh(self):
+        """Reload the whole map; the previous map stays in use until the new one is complete."""
+        person = self.recognized_person
+        session = self.session_factory()
+        try:
+            ids, person_ids = {}, set()
+            for person_id, name in session.query(person.id, person.name).order_by(person.id):
+                ids.setdefault(name, person_id)
+                person_ids.add(person_id)
+        finally:
+            session.close()
+        self._ids, self._person_ids = ids, person_ids
+        return len(ids)
+
+    def get(self, name):
+        """Return the id of the person called ``name``, or None."""
+        return self._ids.get(name)
+
+    def exists(self, person_id):
+        """Return True if a person with this id existed at the last refresh or add."""
+        return person_id in self._person_ids
+
+    def add(self, name, person_id):
+        self._ids.setdefault(name, person_id)
+        self._person_ids.add(person_id)
+
+
+class CaptureWriter:
+    """Queue ``CapturedFace`` rows and write them in bulk on a background thread.
+
+    Rows are flushed as one multi-row INSERT when ``batch_size`` rows are
+    queued or ``flush_interval`` seconds after the first queued row, whichever
+    comes first. Transient database errors are retried with exponential
+    backoff. A batch that still fails is appended to an on-disk NDJSON
+    journal, and the journal is replayed after the next successful flush.
+    A batch the database rejects is written again row by row, and the rows
+    it still rejects are set aside in ``<journal_path>.rejected``. When the
+    queue stays full for ``submit_timeout`` seconds, submitted rows go to the
+    journal too, so no face is dropped.
+    """
+
+    def __init__(self, session_factory, batch_size=50, flush_interval=1.0, max_queue=1000,
+                 journal_path="captured_faces.journal", max_retries=3, retry_backoff=0.5,
+                 person_cache=None, submit_timeout=1.0):
+        from app.models import CapturedFace, RecognizedPerson
+
+        self.captured_face = CapturedFace
+        self.recognized_person = RecognizedPerson
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.rejected_path = journal_path + ".rejected"
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.person_cache = person_cache
+        self.submit_timeout = submit_timeout
+        self.queue = queue.Queue(max_queue)
+        self.flushed = 0
+        self.journaled = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.last_flush_latency = 0.0
+        self._stop_event = threading.Event()
+        self._journal_lock = threading.Lock()  # The journal is also written by submit()
+        self._thread = None
+
+    @property
+    def depth(self):
+        """Number of rows waiting to be written."""
+        return self.queue.qsize()
+
+    def stats(self):
+        """Return queue depth, flush latency and row counters."""
+        return {
+            "depth": self.depth,
+            "last_flush_latency_ms": round(1000 * self.last_flush_latency, 1),
+            "flushed": self.flushed,
+            "journaled": self.journaled,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+        }
+
+    def submit(self, row):
+        """Queue a row (a dict of ``CapturedFace`` columns).
+
+        Waits up to ``submit_timeout`` seconds for room in the queue, then
+        appends the row to the journal instead. Returns False only if the
+        journal cannot be written either and the row was dropped.
+        """
+        try:
+            self.queue.put(row, timeout=self.submit_timeout)
+            return True
+        except queue.Full:
+            pass
+        try:
+            self._append_journal([row])
+        except OSError as e:
+            self.dropped += 1
+            print(f"[ERROR] Save queue full and journal not writable, dropped a face: {e}")
+            return False
+        print(f"[WARNING] Save queue full, face written to {self.journal_path}")
+        return True
+
+    def start(self):
+        """Start the writer thread."""
+        self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        """Flush queued rows and stop the writer thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = 0.1 if deadline is None else deadline - time.monotonic()
+            if deadline is not None and timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                if deadline is None and self._stop_event.is_set():
+                    break
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _run(self):
+        session = self.session_factory()
+        try:
+            self._recover_journal()
+            while not (self._stop_event.is_set() and self.queue.empty()):
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                start = time.perf_counter()
+                flushed = self.flushed
+                left = self._write(session, batch)
+                if self.flushed > flushed:
+                    self.last_flush_latency = time.perf_counter() - start
+                    print(f"[DEBUG] Saved {self.flushed - flushed} faces in "
+                          f"{1000 * self.last_flush_latency:.1f} ms (queue depth {self.depth})")
+                if left:
+                    self._append_journal(left)
+                    print(f"[WARNING] Database unavailable, {len(left)} faces written to {self.journal_path}")
+                else:
+                    self._replay_journal(session)
+        finally:
+            session.close()
+
+    def _resolve_person_ids(self, session, rows):
+        """Fill in ``recognized_person_id`` for named rows that do not carry one.
+
+        Ids carried over from the gallery of people since deleted are cleared
+        first, so they are resolved by name (or left NULL) instead of failing
+        the insert. Names are resolved from the person cache. Only names
+        missing from the cache fall back to one query for the whole batch.
+        """
+        if self.person_cache is not None:
+            for row in rows:
+                person_id = row.get("recognized_person_id")
+                if person_id is not None and not self.person_cache.exists(person_id):
+                    row["recognized_person_id"] = None
+        pending = [row for row in rows
+                   if row.get("recognized_person_id") is None and row["name"] != "Unknown"]
+        if self.person_cache is not None:
+            for row in pending:
+                row["recognized_person_id"] = self.person_cache.get(row["name"])
+            pending = [row for row in pending if row["recognized_person_id"] is None]
+        if not pending:
+            return
+        person = self.recognized_person
+        names = {row["name"] for row in pending}
+        ids = {}
+        for person_id, name in (session.query(person.id, person.name)
+                                .filter(person.name.in_(names)).order_by(person.id)):
+            ids.setdefault(name, person_id)
+        for row in pending:
+            row["recognized_person_id"] = ids.get(row["name"])
+        if self.person_cache is not None:
+            for name, person_id in ids.items():
+                self.person_cache.add(name, person_id)
+
+    def _write(self, session, rows):
+        """Insert rows, retrying transient errors.
+
+        Returns the rows left unwritten because the database stayed
+        unavailable, an empty list once every row is written or rejected.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._resolve_person_ids(session, rows)
+                session.execute(insert(self.captured_face), rows)
+                session.commit()
+                self.flushed += len(rows)
+                return []
+            except TRANSIENT_ERRORS as e:
+                session.rollback()
+                if attempt < self.max_retries:
+                    delay = self.retry_backoff * 2 ** attempt
+                    print(f"[WARNING] Database unavailable, retrying in {delay:.1f}s: {e}")
+                    time.sleep(delay)
+            except Exception as e:
+                session.rollback()
+                print(f"[ERROR] Failed to save {len(rows)} faces, saving them one by one: {e}")
+                return self._write_each(session, rows)
+        return rows
+
+    def _write_each(self, session, rows):
+        """Insert rows one at a time, so only the rows the database rejects are set aside."""
+        for i, row in enumerate(rows):
+            try:
+                session.execute(insert(self.captured_face), [row])
+                session.commit()
+                self.flushed += 1
+            except TRANSIENT_ERRORS:
+                session.rollback()
+                return rows[i:]
+            except Exception as e:
+                session.rollback()
+                self._dump([row], self.rejected_path)
+                self.rejected += 1
+                print(f"[ERROR] Face rejected by the database, written to {self.rejected_path}: {e}")
+        return []
+
+    def _dump(self, rows, path):
+        """Append rows to an NDJSON file, in the format _replay_journal() reads."""
+        with open(path, "a") as f:
+            for row in rows:
+                record = dict(row)
+                record["capture_date"] = record["capture_date"].isoformat()
+                if record.get("image_data") is not None:
+                    record["image_data"] = base64.b64encode(record["image_data"]).decode("ascii")
+                f.write(json.dumps(record) + "\n")
+
+    def _append_journal(self, rows):
+        with self._journal_lock:
+            self._dump(rows, self.journal_path)
+            self.journaled += len(rows)
+
+    def _recover_journal(self):
+        """Put back rows left over from a replay interrupted by a crash."""
+        replay_path = self.journal_path + ".replay"
+        if os.path.exists(replay_path):
+            with self._journal_lock, open(replay_path) as src, open(self.journal_path, "a") as dst:
+                dst.write(src.read())
+            os.remove(replay_path)
+
+    def _replay_journal(self, session):
+        """Insert journaled rows now that the database is reachable again."""
+        replay_path = self.journal_path + ".replay"
+        with self._journal_lock:
+            if not os.path.exists(self.journal_path):
+                return
+            os.replace(self.journal_path, replay_path)
+        with open(replay_path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for row in rows:
+            row["capture_date"] = datetime.fromisoformat(row["capture_date"])
+            if row.get("image_data") is not None:
+                row["image_data"] = base64.b64decode(row["image_data"])
+        for i in range(0, len(rows), self.batch_size):
+            left = self._write(session, rows[i:i + self.batch_size])
+            if left:
+                left += rows[i + self.batch_size:]
+                self._append_journal(left)
+                print(f"[WARNING] Database unavailable again, {len(left)} faces kept in {self.journal_path}")
+                break
+        else:
+            print(f"[INFO] Replayed {len(rows)} journaled faces")
+        os.remove(replay_path)
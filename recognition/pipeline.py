@@ -0,0 +1,167 @@
+"""
+Threaded pipeline stages for the door monitor.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+
+class DropOldestQueue(queue.Queue):
+    """Bounded queue that discards its oldest item instead of blocking when full."""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put(self, item, block=True, timeout=None):
+        """Add an item, dropping the oldest queued item if the queue is full."""
+        with self.not_full:
+            if 0 < self.maxsize <= self._qsize():
+                self._get()
+                self.unfinished_tasks -= 1
+                self.dropped += 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class RoundRobinQueue(DropOldestQueue):
+    """DropOldestQueue holding up to ``maxsize`` items per key, taken in turn.
+
+    Items are grouped by ``key(item)``, the camera of a FrameJob by default.
+    A key's oldest item is dropped when it already has ``maxsize`` queued,
+    and ``get()`` serves the keys one after the other, so a busy camera can
+    neither push another camera's frames out nor make them wait behind its own.
+    """
+
+    def __init__(self, maxsize, key=lambda job: job.camera):
+        self.key = key
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        self.queues = OrderedDict()  # Key -> its items; keys are served front to back
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, item):
+        self.queues.setdefault(self.key(item), deque()).append(item)
+        self._size += 1
+
+    def _get(self):
+        key, items = self.queues.popitem(last=False)
+        if len(items) > 1:
+            self.queues[key] = items  # Back of the line
+        self._size -= 1
+        return items.popleft()
+
+    def put(self, item, block=True, timeout=None):
+        """Add an item, dropping the oldest item of its key if that key is full."""
+        with self.not_full:
+            items = self.queues.get(self.key(item))
+            if items is not None and 0 < self.maxsize <= len(items):
+                items.popleft()
+                self._size -= 1
+                self.unfinished_tasks -= 1
+                self.dropped += 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+@dataclass
+class FrameJob:
+    """A frame travelling through the pipeline together with its results."""
+    seq: int
+    frame: object
+    camera: object = None  # Camera the frame came from
+    timestamp: float = field(default_factory=time.time)
+    motion_detected: bool = False
+    run_detection: bool = False
+    rgb_frame: object = None
+    regions: list = field(default_factory=list)
+    boxes: list = field(default_factory=list)
+    encodings: list = field(default_factory=list)
+    names: list = field(default_factory=list)
+    confidences: list = field(default_factory=list)
+    person_ids: list = field(default_factory=list)
+    track_ids: list = field(default_factory=list)
+    tracks: list = field(default_factory=list)  # Track of each face, with tracking
+    save_indices: list = None  # Faces to save; None means every face
+    processing_time: float = 0.0
+
+
+class Stage:
+    """Pool of worker threads applying ``func`` to items taken from ``inbox``.
+
+    Non-None results are put on ``outbox``. A stage without an inbox is a
+    source: ``func`` is called repeatedly with no arguments. Exceptions raised
+    by ``func`` are logged and the item is dropped, so one bad frame never
+    takes a worker down.
+    """
+
+    def __init__(self, name, func, inbox=None, outbox=None, workers=1):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, int(workers))
+        self.processed = 0
+        self.busy_time = 0.0
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads."""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=2.0):
+        """Signal the workers to stop and wait for them to exit."""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def running(self):
+        return not self._stop_event.is_set()
+
+    def _next_item(self):
+        if self.inbox is None:
+            return ()
+        try:
+            return (self.inbox.get(timeout=0.1),)
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            args = self._next_item()
+            if args is None:
+                continue
+            start = time.perf_counter()
+            try:
+                result = self.func(*args)
+            except Exception as e:
+                print(f"[ERROR] {self.name} stage failed: {e}")
+                result = None
+            finally:
+                if self.inbox is not None:
+                    self.inbox.task_done()
+            with self._lock:
+                self.processed += 1
+                self.busy_time += time.perf_counter() - start
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+
+    def summary(self):
+        """Return a one-line report of the work done by this stage."""
+        average = 1000 * self.busy_time / self.processed if self.processed else 0.0
+        return "{}: {} items, avg {:.1f} ms".format(self.name, self.processed, average)
@@ -0,0 +1,134 @@
+"""
+On-demand MJPEG preview of the door monitor cameras.
+
+The preview server serves ``/<camera id>.mjpg`` as a
+``multipart/x-mixed-replace`` stream. Nothing is drawn or encoded while no
+one is watching: a viewer's request pulls the camera's latest frame,
+annotates and encodes it at most ``max_fps`` times per second, and
+viewers of the same camera share each encoded frame.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+BOUNDARY = "frame"
+
+
+def annotate(frame, boxes, names):
+    """Draw face boxes and names on a frame in place."""
+    for ((top, right, bottom, left), name) in zip(boxes, names):
+        color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
+        cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+        y = top - 15 if top - 15 > 15 else top + 15
+        cv2.putText(frame, name, (left, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+    return frame
+
+
+class PreviewFeed:
+    """Annotated JPEG frames of one camera, encoded only when asked for."""
+
+    def __init__(self, camera, quality=70):
+        self.camera = camera
+        self.quality = quality
+        self.viewers = 0
+        self.encoded = 0
+        self._jpeg = (0, None)  # (seq, bytes) of the last encoded frame
+        self._lock = threading.Lock()
+
+    def jpeg(self):
+        """Return (seq, JPEG bytes) of the camera's latest frame, or None before the first frame."""
+        with self._lock:
+            seq, frame = self.camera.latest_frame()
+            if frame is None:
+                return None
+            if seq != self._jpeg[0]:
+                _, boxes, names = self.camera.results()
+                frame = annotate(frame.copy(), boxes, names)
+                ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    self._jpeg = (seq, buf.tobytes())
+                    self.encoded += 1
+            return self._jpeg
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        camera_id = self.path.lstrip("/").split("?")[0]
+        feed = self.server.feeds.get(camera_id[:-5]) if camera_id.endswith(".mjpg") else None
+        if feed is None:
+            self.send_error(404, "Unknown camera")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache, private")
+        self.send_header("Pragma", "no-cache")
+        self.end_headers()
+
+        with self.server.lock:
+            feed.viewers += 1
+        interval = 1.0 / self.server.max_fps
+        last_seq = 0
+        try:
+            while not self.server.stopping.is_set():
+                start = time.monotonic()
+                frame = feed.jpeg()
+                if frame is not None and frame[0] != last_seq:
+                    last_seq, data = frame
+                    self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                     f"Content-Length: {len(data)}\r\n\r\n".encode())
+                    self.wfile.write(data)
+                    self.wfile.write(b"\r\n")
+                    self.wfile.flush()
+                self.server.stopping.wait(max(0.0, interval - (time.monotonic() - start)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The viewer went away
+        finally:
+            with self.server.lock:
+                feed.viewers -= 1
+
+    def log_message(self, format, *args):
+        pass  # Keep viewer requests out of the monitor's log
+
+
+class PreviewServer(ThreadingHTTPServer):
+    """HTTP server streaming annotated MJPEG previews of ``cameras``.
+
+    Each viewer gets at most ``max_fps`` frames per second; frames are only
+    annotated and encoded while at least one viewer is connected.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, cameras, host="127.0.0.1", port=8081, max_fps=5, quality=70):
+        super().__init__((host, port), _PreviewHandler)
+        self.feeds = {str(camera.id): PreviewFeed(camera, quality) for camera in cameras}
+        self.max_fps = max(0.1, float(max_fps))
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def viewers(self):
+        with self.lock:
+            return sum(feed.viewers for feed in self.feeds.values())
+
+    def start(self):
+        """Serve previews on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="preview", daemon=True)
+        self._thread.start()
+        print("[INFO] Preview available at http://{}:{}/<camera>.mjpg".format(*self.server_address[:2]))
+        return self
+
+    def stop(self):
+        """Disconnect viewers and stop serving."""
+        self.stopping.set()
+        self.shutdown()
+        self.server_close()
+
+    def summary(self):
+        """Return a one-line report of the frames encoded for viewers."""
+        return ", ".join("{}: {} frames encoded".format(camera_id, feed.encoded)
+                         for camera_id, feed in self.feeds.items())
@@ -0,0 +1,121 @@
+"""
+Per-person prototype compaction of a face encoding gallery.
+
+Each person is reduced to a centroid plus up to ``max_medoids`` medoids of
+their outlying encodings (profile shots, glasses, poor light). The radius
+stored for each person is the largest distance from any of their encodings
+to its nearest prototype.
+"""
+import numpy as np
+
+from .index import squared_distances
+
+
+def _pairwise(points):
+    return np.sqrt(squared_distances(points, points))
+
+
+def _k_medoids(points, k, iterations=10):
+    """Return the row indices of ``k`` medoids of ``points``."""
+    distances = _pairwise(points)
+    # Farthest-point initialisation starting from the most central point
+    medoids = [int(np.argmin(distances.sum(axis=1)))]
+    while len(medoids) < k:
+        medoids.append(int(np.argmax(distances[:, medoids].min(axis=1))))
+    for _ in range(iterations):
+        labels = np.argmin(distances[:, medoids], axis=1)
+        updated = []
+        for cluster in range(len(medoids)):
+            members = np.flatnonzero(labels == cluster)
+            if not members.size:
+                updated.append(medoids[cluster])
+                continue
+            within = distances[np.ix_(members, members)].sum(axis=1)
+            updated.append(int(members[np.argmin(within)]))
+        if updated == medoids:
+            break
+        medoids = updated
+    return medoids
+
+
+def person_prototypes(encodings, max_medoids=3, outlier_quantile=0.75):
+    """Return ``(prototypes, radius)`` for one person's encodings.
+
+    Encodings farther from the centroid than the ``outlier_quantile`` of
+    those distances are summarised by k-medoids.
+    """
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+    centroid = encodings.mean(axis=0, keepdims=True)
+    prototypes = centroid
+    if max_medoids > 0 and len(encodings) > 2:
+        to_centroid = np.linalg.norm(encodings - centroid, axis=1)
+        outliers = encodings[to_centroid > np.quantile(to_centroid, outlier_quantile)]
+        if len(outliers):
+            medoids = _k_medoids(outliers, min(max_medoids, len(outliers)))
+            prototypes = np.vstack([centroid, outliers[medoids]])
+    radius = float(np.sqrt(squared_distances(encodings, prototypes).min(axis=1).max()))
+    return prototypes.astype(np.float32), radius
+
+
+def compact_gallery(encodings, names, max_medoids=3, outlier_quantile=0.75):
+    """Reduce a gallery to per-person prototypes.
+
+    Returns a dict with the ``prototypes`` matrix, the ``prototype_names``
+    of its rows and the per-person ``radii``.
+    """
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+    names = np.asarray(names, dtype=object)
+    prototypes, prototype_names, radii = [], [], {}
+    for name in sorted(set(names)):
+        person, radius = person_prototypes(encodings[names == name], max_medoids, outlier_quantile)
+        prototypes.append(person)
+        prototype_names.extend([name] * len(person))
+        radii[name] = radius
+    return {
+        "prototypes": np.vstack(prototypes) if prototypes else np.zeros((0, 128), np.float32),
+        "prototype_names": prototype_names,
+        "radii": radii,
+    }
+
+
+def evaluate_compaction(encodings, names, threshold, margin=0.05, holdout_every=5, **options):
+    """Compare identification accuracy of the full and the compacted gallery.
+
+    Every ``holdout_every``-th encoding of each person with at least two
+    encodings is held out as a probe. Both galleries are built from the
+    remaining encodings and asked to identify the probes.
+    """
+    from .matcher import FaceMatcher
+
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+    names = np.asarray(names, dtype=object)
+    probe = np.zeros(len(names), dtype=bool)
+    for name in set(names):
+        rows = np.flatnonzero(names == name)
+        if len(rows) >= 2:
+            probe[rows[::holdout_every]] = True
+    if not probe.any():
+        return None
+
+    gallery, gallery_names = encodings[~probe], names[~probe]
+    compact = compact_gallery(gallery, gallery_names, **options)
+    exact = FaceMatcher(gallery, gallery_names, threshold=threshold)
+    compacted = FaceMatcher(gallery, gallery_names, threshold=threshold,
+                            prototypes=compact["prototypes"],
+                            prototype_names=compact["prototype_names"],
+                            refine_margin=margin, radii=compact["radii"])
+
+    truth = names[probe]
+    exact_hits = [r[0] == t for r, t in zip(exact.identify(encodings[probe]), truth)]
+    compact_hits = [r[0] == t for r, t in zip(compacted.identify(encodings[probe]), truth)]
+    exact_accuracy = float(np.mean(exact_hits))
+    compact_accuracy = float(np.mean(compact_hits))
+    return {
+        "probes": int(probe.sum()),
+        "gallery_rows": len(gallery),
+        "prototype_rows": len(compact["prototypes"]),
+        "exact_accuracy": exact_accuracy,
+        "compact_accuracy": compact_accuracy,
+        "accuracy_delta": compact_accuracy - exact_accuracy,
+        "refine_rate": compacted.refined / int(probe.sum()),
+    }
@@ -0,0 +1,87 @@
+"""
+Hot reload of the gallery in a running monitor.
+"""
+import os
+import threading
+import time
+
+from .gallery import load_gallery
+
+
+class GalleryWatcher:
+    """Watch a gallery file and swap in a freshly built matcher when it changes.
+
+    ``build_matcher`` turns a ``Gallery`` into a matcher. It runs on the
+    watcher thread, so recognition keeps using the current matcher until the
+    new one is complete. The swap itself is a single attribute assignment:
+    readers take ``watcher.matcher`` once per frame and always see either the
+    old or the new matcher. Galleries are replaced atomically on disk (see
+    ``Gallery.save``), so a half-written file is never read.
+    """
+
+    def __init__(self, path, build_matcher, interval=2.0, on_reload=None):
+        self.path = path
+        self.build_matcher = build_matcher
+        self.interval = interval
+        self.on_reload = on_reload
+        self.matcher = None
+        self.generation = None
+        self.reloads = 0
+        self._signature = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """Load the gallery and build the matcher synchronously; return the matcher."""
+        self._signature = self._stat_signature()
+        gallery = load_gallery(self.path)
+        self.matcher = self.build_matcher(gallery)
+        self.generation = gallery.generation
+        if self.on_reload:
+            self.on_reload(gallery, self.matcher)
+        return self.matcher
+
+    def check(self):
+        """Reload if the gallery file changed; return True if a new matcher was swapped in."""
+        try:
+            signature = self._stat_signature()
+        except FileNotFoundError:
+            return False
+        if signature == self._signature:
+            return False
+        # Remember the signature even if loading fails, so a bad file is reported once
+        self._signature = signature
+        try:
+            gallery = load_gallery(self.path)
+            start = time.perf_counter()
+            matcher = self.build_matcher(gallery)
+        except Exception as e:
+            print(f"[ERROR] Gallery reload failed, keeping generation {self.generation}: {e}")
+            return False
+        self.matcher = matcher
+        self.generation = gallery.generation
+        self.reloads += 1
+        print(f"[INFO] Gallery generation {gallery.generation} loaded: {len(gallery)} encodings "
+              f"(built in {time.perf_counter() - start:.2f}s)")
+        if self.on_reload:
+            self.on_reload(gallery, matcher)
+        return True
+
+    def start(self):
+        """Start polling the gallery file on a background thread."""
+        self._thread = threading.Thread(target=self._run, name="gallery-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(self.interval + 1)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
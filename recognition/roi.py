@@ -0,0 +1,72 @@
+"""
+Region-of-interest face detection driven by the motion mask.
+
+Motion contours are turned into padded, merged regions and the face
+detector runs on those crops only. The boxes it finds are mapped back to
+full-frame coordinates.
+"""
+import cv2
+
+
+def _overlaps(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[3] <= b[1] and b[3] <= a[1]
+
+
+def merge_regions(regions):
+    """Merge overlapping (top, right, bottom, left) regions until none overlap."""
+    regions = list(regions)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                if _overlaps(regions[i], regions[j]):
+                    a, b = regions[i], regions.pop(j)
+                    regions[i] = (min(a[0], b[0]), max(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3]))
+                    merged = True
+                    break
+            if merged:
+                break
+    return regions
+
+
+def motion_regions(contours, frame_shape, min_area=100, padding=0.5, min_size=96):
+    """Return padded, merged (top, right, bottom, left) regions around motion contours.
+
+    Each contour's bounding box grows by ``padding`` times its larger side
+    (a moving shoulder still yields the head above it). Regions are at least
+    ``min_size`` pixels wide and high, and are clipped to the frame.
+    """
+    height, width = frame_shape[:2]
+    regions = []
+    for contour in contours:
+        if cv2.contourArea(contour) <= min_area:
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        pad = int(padding * max(w, h))
+        grow_x = max(pad, (min_size - w) // 2)
+        grow_y = max(pad, (min_size - h) // 2)
+        regions.append((max(0, y - grow_y), min(width, x + w + grow_x),
+                        min(height, y + h + grow_y), max(0, x - grow_x)))
+    return merge_regions(regions)
+
+
+def detect_in_regions(rgb_frame, regions, detect, scale=1.0):
+    """Run ``detect`` on every region crop and map the boxes to frame coordinates.
+
+    ``detect`` takes an RGB image and returns (top, right, bottom, left)
+    boxes. Crops are resized by ``scale`` before detection. Returns
+    ``(boxes, pixels)`` where ``pixels`` is the number of pixels scanned.
+    """
+    boxes, pixels = [], 0
+    for top, right, bottom, left in regions:
+        crop = rgb_frame[top:bottom, left:right]
+        if crop.size == 0:
+            continue
+        if scale != 1.0:
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        pixels += crop.shape[0] * crop.shape[1]
+        for (t, r, b, l) in detect(crop):
+            boxes.append((top + int(t / scale), left + int(r / scale),
+                          top + int(b / scale), left + int(l / scale)))
+    return boxes, pixels
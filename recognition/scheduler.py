@@ -0,0 +1,61 @@
+"""
+Motion-gated scheduling of face recognition for the door monitor.
+"""
+import threading
+
+
+class RecognitionScheduler:
+    """Decide which frames run face detection and account for the work skipped.
+
+    Detection runs on every frame with motion. Without motion it only runs
+    every ``idle_interval`` frames, so people standing still in front of the
+    door are still picked up. An ``idle_interval`` of 0 disables idle
+    detection entirely.
+    """
+
+    def __init__(self, idle_interval=10):
+        self.idle_interval = max(0, int(idle_interval))
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.detection_time = 0.0
+        self._idle_frames = 0
+        self._lock = threading.Lock()
+
+    def should_run(self, motion_detected):
+        """Return True if detection should run on the current frame."""
+        if motion_detected:
+            self._idle_frames = 0
+            return True
+        self._idle_frames += 1
+        if self.idle_interval and self._idle_frames >= self.idle_interval:
+            self._idle_frames = 0
+            return True
+        self.frames_skipped += 1
+        return False
+
+    def record(self, elapsed):
+        """Record the time (seconds) spent on a processed frame."""
+        with self._lock:
+            self.frames_processed += 1
+            self.detection_time += elapsed
+
+    @property
+    def average_cost(self):
+        """Average detection time per processed frame, in seconds."""
+        if not self.frames_processed:
+            return 0.0
+        return self.detection_time / self.frames_processed
+
+    @property
+    def time_saved(self):
+        """Estimated detection time saved by skipped frames, in seconds."""
+        return self.frames_skipped * self.average_cost
+
+    def summary(self):
+        """Return a one-line report of processed and skipped frames."""
+        total = self.frames_processed + self.frames_skipped
+        skipped_pct = 100.0 * self.frames_skipped / total if total else 0.0
+        return ("processed {} frames, skipped {} ({:.1f}%), "
+                "avg detection {:.1f} ms, ~{:.1f} s CPU saved").format(
+                    self.frames_processed, self.frames_skipped, skipped_pct,
+                    self.average_cost * 1000, self.time_saved)
@@ -0,0 +1,211 @@
+"""
+Lightweight face tracking across frames.
+
+Detected boxes are associated with existing tracks by IoU. A track keeps
+the identity of its last encoding, so a face that stays in view is only
+re-encoded when its track is new, stale or low-confidence. Between
+detections, tracks can optionally follow the face with an OpenCV KCF or
+CSRT tracker.
+
+Tracks also decide when a face is saved: once per visit, as soon as it is
+recognized, or as Unknown after a few detections without a match. A visit
+first saved as Unknown is saved once more when it is recognized later.
+"""
+import itertools
+import threading
+from collections import deque
+
+HISTORY_SIZE = 16  # Recent (seq, box) positions kept per track to place late frames
+
+
+def iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes."""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    if not inter:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return inter / float(area_a + area_b - inter)
+
+
+def create_cv_tracker(kind):
+    """Create an OpenCV 'kcf' or 'csrt' tracker, or return None if unavailable."""
+    import cv2
+
+    name = f"Tracker{kind.upper()}_create"
+    factory = getattr(cv2, name, None) or getattr(getattr(cv2, "legacy", None), name, None)
+    return factory() if factory else None
+
+
+class Track:
+    """A face followed across frames, with the identity of its last encoding."""
+
+    def __init__(self, track_id, box, seq):
+        self.id = track_id
+        self.box = box
+        self.history = deque([(seq, box)], maxlen=HISTORY_SIZE)
+        self.first_seen = seq
+        self.last_seen = seq
+        self.encoded_at = None
+        self.name = "Unknown"
+        self.person_id = None
+        self.confidence = 0.0
+        self.hits = 0  # Detections matched to the track
+        self.saved_name = None  # Name the visit was saved under, None until saved
+        self.save_pending = None  # Frame whose save is queued but not confirmed yet
+        self.cv_tracker = None
+
+
+class FaceTracker:
+    """Assign track ids to detected faces and decide which need encoding.
+
+    A matched track is re-encoded when its identity is older than
+    ``reencode_interval`` frames or its confidence is below
+    ``min_confidence``. Tracks not seen for ``max_age`` frames are dropped.
+    An Unknown track is saved after ``unknown_save_frames`` detections.
+    Frames older than the last update (finished out of order by parallel
+    workers) are matched against where the tracks were at that frame,
+    without moving them; their unmatched boxes are left untracked, as newer
+    frames already decided which faces are new.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=30, reencode_interval=15,
+                 min_confidence=0.55, cv_tracker=None, unknown_save_frames=3):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.reencode_interval = reencode_interval
+        self.min_confidence = min_confidence
+        self.unknown_save_frames = unknown_save_frames
+        self.cv_tracker = cv_tracker
+        self.tracks = []
+        self.last_seq = 0
+        self.encodes_saved = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def update(self, seq, boxes, frame=None):
+        """Associate ``boxes`` with tracks.
+
+        Returns a list aligned with ``boxes`` of ``(track, needs_encoding)``.
+        ``track`` is None for boxes of a late frame that match no track.
+        """
+        with self._lock:
+            late = seq < self.last_seq
+            if not late:
+                self.last_seq = seq
+                self.tracks = [t for t in self.tracks if seq - t.last_seen <= self.max_age]
+
+            pairs = sorted(((iou(self._box_at(t, seq) if late else t.box, box), ti, bi)
+                            for ti, t in enumerate(self.tracks) for bi, box in enumerate(boxes)),
+                           reverse=True)
+            assigned, used = {}, set()
+            for overlap, ti, bi in pairs:
+                if overlap < self.iou_threshold:
+                    break
+                if bi in assigned or ti in used:
+                    continue
+                assigned[bi] = self.tracks[ti]
+                used.add(ti)
+
+            results = []
+            for bi, box in enumerate(boxes):
+                track = assigned.get(bi)
+                if track is None and late:
+                    results.append((None, True))
+                    continue
+                if track is None:
+                    track = Track(next(self._ids), box, seq)
+                    self.tracks.append(track)
+                elif not late:
+                    track.box = box
+                    track.last_seen = seq
+                    track.history.append((seq, box))
+                track.hits += 1
+                if frame is not None and self.cv_tracker and not late:
+                    self._init_cv_tracker(track, frame)
+                results.append((track, self._needs_encoding(track, seq)))
+            self.encodes_saved += sum(1 for _, needed in results if not needed)
+            return results
+
+    @staticmethod
+    def _box_at(track, seq):
+        """The track's detected box nearest in time to frame ``seq``."""
+        return min(track.history, key=lambda entry: abs(entry[0] - seq))[1]
+
+    def _needs_encoding(self, track, seq):
+        return (track.encoded_at is None
+                or seq - track.encoded_at >= self.reencode_interval
+                or track.confidence < self.min_confidence)
+
+    def assign(self, track, seq, name, confidence, person_id=None):
+        """Store the identity found by encoding a track's face.
+
+        An identity from an older frame than the track's current one is ignored.
+        """
+        with self._lock:
+            if track.encoded_at is not None and seq < track.encoded_at:
+                return
+            if track.saved_name not in (None, "Unknown", name):
+                track.saved_name = None  # A different person: record a new visit
+            track.name = name
+            track.confidence = confidence
+            track.person_id = person_id
+            track.encoded_at = seq
+
+    def claim_save(self, track, seq):
+        """Return True if the track's face should be saved from frame ``seq``.
+
+        A visit is saved once recognized, or as Unknown after
+        ``unknown_save_frames`` detections, and saved again if it was saved
+        as Unknown and is recognized later. A claimed save blocks further
+        ones until mark_saved() or release_save() is called for it, or
+        ``max_age`` frames have passed.
+        """
+        with self._lock:
+            if track.save_pending is not None and abs(seq - track.save_pending) <= self.max_age:
+                return False
+            if track.saved_name is None:
+                due = track.name != "Unknown" or track.hits >= self.unknown_save_frames
+            else:
+                due = track.saved_name == "Unknown" and track.name != "Unknown"
+            if due:
+                track.save_pending = seq
+            return due
+
+    def mark_saved(self, track, name):
+        """Record that the face claimed by claim_save() was queued for saving as ``name``."""
+        with self._lock:
+            track.saved_name = name
+            track.save_pending = None
+
+    def release_save(self, track):
+        """Give up a save claimed by claim_save(), so a later frame saves the face."""
+        with self._lock:
+            track.save_pending = None
+
+    def _init_cv_tracker(self, track, frame):
+        top, right, bottom, left = track.box
+        track.cv_tracker = create_cv_tracker(self.cv_tracker)
+        if track.cv_tracker is not None:
+            track.cv_tracker.init(frame, (left, top, right - left, bottom - top))
+
+    def predict(self, frame):
+        """Move tracks with their OpenCV trackers on a frame without detection.
+
+        Returns the ``(boxes, names)`` of the tracks that were followed.
+        """
+        boxes, names = [], []
+        with self._lock:
+            for track in self.tracks:
+                if track.cv_tracker is None or track.encoded_at is None:
+                    continue
+                ok, (x, y, w, h) = track.cv_tracker.update(frame)
+                if not ok:
+                    track.cv_tracker = None
+                    continue
+                track.box = (int(y), int(x + w), int(y + h), int(x))
+                boxes.append(track.box)
+                names.append(track.name)
+        return boxes, names
@@ -0,0 +1,120 @@
+"""
+Parallel face encoding of dataset images for train_model.py.
+"""
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+EMPTY_ENCODINGS = np.zeros((0, 128), dtype=np.float32)
+
+# Detectors built in this process, keyed by backend and options
+_detectors = {}
+
+
+def _get_detector(detector, options):
+    from .detectors import create_detector
+
+    key = (detector, tuple(sorted((options or {}).items())))
+    if key not in _detectors:
+        _detectors[key] = create_detector(detector, **(options or {}))
+    return _detectors[key]
+
+
+def encode_image(image_path, detector="hog", detector_options=None):
+    """Detect and encode the faces of one image.
+
+    Returns ``(image_path, name, encodings)`` where ``name`` is the person
+    folder and ``encodings`` is a float32 array of shape (faces, 128).
+    """
+    import cv2
+
+    name = image_path.split(os.path.sep)[-2]
+    image = cv2.imread(image_path)
+    if image is None:
+        return image_path, name, EMPTY_ENCODINGS
+    return image_path, name, _encode_bgr(image, detector, detector_options)
+
+
+def encode_image_bytes(data, detector="hog", detector_options=None):
+    """Detect and encode the faces of an encoded (JPEG, PNG...) image.
+
+    Returns a float32 array of shape (faces, 128), empty if the image has
+    no face or cannot be decoded.
+    """
+    import cv2
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return EMPTY_ENCODINGS
+    return _encode_bgr(image, detector, detector_options)
+
+
+def _encode_bgr(image, detector, detector_options):
+    import cv2
+    import face_recognition
+
+    # convert from BGR (OpenCV ordering) to dlib ordering (RGB)
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    boxes = _get_detector(detector, detector_options)(rgb)
+    encodings = face_recognition.face_encodings(rgb, boxes)
+    if not encodings:
+        return EMPTY_ENCODINGS
+    return np.asarray(encodings, dtype=np.float32)
+
+
+def _encode_chunk(args):
+    chunk, detector, detector_options = args
+    return [encode_image(path, detector, detector_options) for path in chunk]
+
+
+class ProgressReporter:
+    """Print progress and throughput at most every ``interval`` seconds."""
+
+    def __init__(self, total, interval=2.0):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.faces = 0
+        self.start = time.perf_counter()
+        self._last_report = self.start
+
+    def update(self, images, faces):
+        self.done += images
+        self.faces += faces
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval or self.done == self.total:
+            self._last_report = now
+            print(self.summary())
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else 0.0
+        return "[INFO] encoded {}/{} images, {} faces ({:.1f} img/s, ETA {:.0f}s)".format(
+            self.done, self.total, self.faces, rate, eta)
+
+
+def encode_images(image_paths, workers=None, chunk_size=8, detector="hog", detector_options=None):
+    """Encode ``image_paths`` on a pool of ``workers`` processes.
+
+    Images are handed out in chunks of ``chunk_size`` and results are yielded
+    as ``(image_path, name, encodings)`` in completion order. With a single
+    worker everything runs in the calling process.
+    """
+    workers = workers or os.cpu_count() or 1
+    progress = ProgressReporter(len(image_paths))
+    if workers == 1 or len(image_paths) <= chunk_size:
+        for path in image_paths:
+            result = encode_image(path, detector, detector_options)
+            progress.update(1, len(result[2]))
+            yield result
+        return
+
+    chunks = [(image_paths[i:i + chunk_size], detector, detector_options)
+              for i in range(0, len(image_paths), chunk_size)]
+    with multiprocessing.Pool(min(workers, len(chunks))) as pool:
+        for results in pool.imap_unordered(_encode_chunk, chunks):
+            progress.update(len(results), sum(len(r[2]) for r in results))
+            yield from results
@@ -0,0 +1,20 @@
+import pytest
+
+from app import create_app
+from app.extensions import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config.update(LOGIN_DISABLED=True, BLOB_DIR=str(tmp_path / 'blobs'),
+                      THUMBNAIL_DIR=str(tmp_path / 'thumbnails'))
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+from recognition.gallery import Gallery, GalleryError, load_gallery
+
+
+@pytest.fixture
+def gallery():
+    rng = np.random.default_rng(0)
+    return Gallery(rng.random((3, 128), dtype=np.float32), ["alice", "alice", "bob"],
+                   person_ids=[1, 1, 2], paths=["a1.jpg", "a2.jpg", "b1.jpg"],
+                   prototypes=rng.random((2, 128), dtype=np.float32),
+                   prototype_names=["alice", "bob"], radii={"alice": 0.2, "bob": 0.1})
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(gallery, tmp_path, mmap):
+    path = str(tmp_path / "encodings.gallery")
+    gallery.save(path)
+    loaded = load_gallery(path, mmap=mmap, verify=True)
+    np.testing.assert_array_equal(loaded.encodings, gallery.encodings)
+    np.testing.assert_array_equal(loaded.prototypes, gallery.prototypes)
+    assert loaded.names == gallery.names
+    assert loaded.person_ids.tolist() == [1, 1, 2]
+    assert loaded.paths == gallery.paths
+    assert loaded.prototype_names == ["alice", "bob"]
+    assert loaded.radii == {"alice": 0.2, "bob": 0.1}
+    assert loaded.generation == gallery.generation == 1
+
+
+def test_save_bumps_generation(gallery, tmp_path):
+    path = str(tmp_path / "encodings.gallery")
+    gallery.save(path)
+    load_gallery(path).save(path)
+    assert load_gallery(path).generation == 2
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_truncated_file(gallery, tmp_path, mmap):
+    path = str(tmp_path / "encodings.gallery")
+    gallery.save(path)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 4)
+    with pytest.raises(GalleryError, match="truncated"):
+        load_gallery(path, mmap=mmap)
+
+
+def test_corrupt_data_fails_verification(gallery, tmp_path):
+    path = str(tmp_path / "encodings.gallery")
+    gallery.save(path)
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"\x01")
+    load_gallery(path)
+    with pytest.raises(GalleryError, match="checksum"):
+        load_gallery(path, verify=True)
+
+
+def test_pickle_refused_by_default(tmp_path):
+    path = tmp_path / "encodings.pickle"
+    path.write_bytes(b"\x80\x04N.")
+    with pytest.raises(GalleryError):
+        load_gallery(str(path))
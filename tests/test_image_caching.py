@@ -0,0 +1,108 @@
+import io
+from datetime import datetime
+
+import pytest
+from PIL import Image
+from sqlalchemy import event
+
+from app.blobstore import set_image
+from app.extensions import db
+from app.models import CapturedFace
+
+
+def jpeg(size=(400, 300)):
+    out = io.BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(out, format='JPEG')
+    return out.getvalue()
+
+
+@pytest.fixture
+def stored_face(app):
+    face = CapturedFace(name='alice', capture_date=datetime(2026, 10, 18, 9, 30), image_format='JPEG')
+    set_image(face, jpeg())
+    db.session.add(face)
+    db.session.commit()
+    return face.id
+
+
+@pytest.fixture
+def legacy_face(app):
+    face = CapturedFace(name='bob', capture_date=datetime(2026, 10, 18, 9, 31), image_format='JPEG',
+                        image_data=jpeg())
+    db.session.add(face)
+    db.session.commit()
+    return face.id
+
+
+@pytest.mark.parametrize('face', ['stored_face', 'legacy_face'])
+def test_image_has_validators(client, request, face):
+    response = client.get(f'/image/{request.getfixturevalue(face)}')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert response.headers['ETag'] and response.headers['Last-Modified']
+    assert 'private' in response.headers['Cache-Control']
+
+
+@pytest.mark.parametrize('face', ['stored_face', 'legacy_face'])
+def test_matching_etag_gets_304(client, request, face):
+    url = f'/image/{request.getfixturevalue(face)}'
+    etag = client.get(url).headers['ETag']
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_last_modified_gets_304(client, stored_face):
+    url = f'/image/{stored_face}'
+    last_modified = client.get(url).headers['Last-Modified']
+    assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+def test_last_modified_is_in_gmt(app, client, stored_face):
+    # Stored dates are naive, in TIMEZONE: 09:30 in Tunis (UTC+1) is 08:30 GMT
+    app.config['TIMEZONE'] = 'Africa/Tunis'
+    response = client.get(f'/image/{stored_face}')
+    assert response.headers['Last-Modified'] == 'Sun, 18 Oct 2026 08:30:00 GMT'
+    earlier = {'If-Modified-Since': 'Sun, 18 Oct 2026 08:29:59 GMT'}
+    assert client.get(f'/image/{stored_face}', headers=earlier).status_code == 200
+
+
+def test_stale_etag_gets_the_image(client, stored_face):
+    response = client.get(f'/image/{stored_face}', headers={'If-None-Match': '"face-0-0-0-full-jpeg"'})
+    assert response.status_code == 200 and response.data
+
+
+def test_thumbnail_has_its_own_etag(client, stored_face):
+    url = f'/image/{stored_face}'
+    full = client.get(url)
+    thumb = client.get(url + '?size=thumb', headers={'Accept': 'image/jpeg'})
+    assert thumb.status_code == 200
+    assert thumb.headers['ETag'] != full.headers['ETag']
+    assert 'Accept' in thumb.headers['Vary']
+    assert max(Image.open(io.BytesIO(thumb.data)).size) <= 160
+    response = client.get(url + '?size=thumb', headers={'Accept': 'image/jpeg',
+                                                        'If-None-Match': thumb.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_304_does_not_load_the_blob(client, legacy_face):
+    url = f'/image/{legacy_face}'
+    etag = client.get(url).headers['ETag']
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert statements
+    assert all('length(captured_face.image_data)' in s for s in statements if 'image_data' in s)
+
+
+def test_unknown_size_is_rejected(client, stored_face):
+    assert client.get(f'/image/{stored_face}?size=huge').status_code == 400
+
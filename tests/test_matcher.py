@@ -0,0 +1,48 @@
+import numpy as np
+
+from recognition.matcher import FaceMatcher
+from recognition.prototypes import compact_gallery
+
+
+def point(*coords):
+    vector = np.zeros(128, dtype=np.float32)
+    vector[:len(coords)] = coords
+    return vector
+
+
+def gallery():
+    # Alice: a tight cluster plus one photo far from it; Bob elsewhere
+    alice = [point(0.0, 0.01 * i) for i in range(6)] + [point(0.9)]
+    bob = [point(0.0, 0.0, 2.0 + 0.01 * i) for i in range(6)]
+    return np.array(alice + bob), ["alice"] * 7 + ["bob"] * 6
+
+
+def matcher(**options):
+    encodings, names = gallery()
+    compact = compact_gallery(encodings, names, max_medoids=0)
+    return FaceMatcher(encodings, names, threshold=0.6, prototypes=compact["prototypes"],
+                       prototype_names=compact["prototype_names"], radii=compact["radii"], **options)
+
+
+def test_member_far_from_every_prototype_is_recognised():
+    faces = matcher()
+    query = point(0.9, 0.1)
+    assert np.linalg.norm(faces.prototypes - query, axis=1).min() > 0.6 + faces.refine_margin
+    name, _, distance = faces.identify([query])[0]
+    assert name == "alice" and distance < 0.6
+    assert faces.refined == 1
+
+
+def test_prototypes_agree_with_exact_matching():
+    encodings, names = gallery()
+    exact = FaceMatcher(encodings, names, threshold=0.6)
+    faces = matcher()
+    queries = [point(0.9, 0.1), point(0.0, 0.05), point(0.0, 0.0, 2.1), point(5.0), point(0.45)]
+    assert [r[0] for r in faces.identify(queries)] == [r[0] for r in exact.identify(queries)]
+
+
+def test_clear_match_and_stranger_skip_refinement():
+    faces = matcher()
+    results = faces.identify([point(0.0, 0.02), point(0.0, 5.0)])
+    assert [r[0] for r in results] == ["alice", "Unknown"]
+    assert faces.refined == 0
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import template_rendered
+
+from app.extensions import db
+from app.models import CapturedFace
+from app.routes.main import FACES_PER_PAGE
+
+
+@pytest.fixture
+def faces(app):
+    start = datetime(2026, 10, 1, 8, 0)
+    for i in range(2 * FACES_PER_PAGE + 5):
+        # Pairs of faces share a capture date, so the id has to break ties
+        db.session.add(CapturedFace(name='alice' if i % 3 else 'bob', confidence=0.9,
+                                    capture_date=start + timedelta(minutes=i // 2)))
+    db.session.commit()
+    rows = CapturedFace.query.order_by(CapturedFace.capture_date.desc(), CapturedFace.id.desc())
+    return [face.id for face in rows]
+
+
+@pytest.fixture
+def pages(app, client):
+    """Fetch a dashboard URL and return its page of faces and pagination links."""
+    rendered = []
+
+    def record(sender, template, context, **extra):
+        rendered.append(context)
+
+    def fetch(url):
+        rendered.clear()
+        assert client.get(url).status_code == 200
+        context = rendered[-1]
+        return [face.id for face in context['captured_faces']], context['newer_url'], context['older_url']
+
+    template_rendered.connect(record, app)
+    yield fetch
+    template_rendered.disconnect(record, app)
+
+
+def test_older_pages_cover_every_face_once(faces, pages):
+    seen, url, newer = [], '/', []
+    while url:
+        ids, newer_url, url = pages(url)
+        assert len(ids) <= FACES_PER_PAGE
+        seen += ids
+        newer.append(newer_url)
+    assert seen == faces
+    assert newer[0] is None and all(newer[1:])
+
+
+def test_newer_links_return_to_the_same_pages(faces, pages):
+    forward, url = [], '/'
+    while url:
+        ids, _, url = pages(url)
+        forward.append(ids)
+    url = pages('/?after=' + cursor_of(faces[2 * FACES_PER_PAGE - 1]))[1]
+    backward = []
+    while url:
+        ids, url, _ = pages(url)
+        backward.append(ids)
+    assert backward == [forward[1], forward[0]]
+
+
+def test_links_keep_the_filters(faces, pages):
+    alices = [face.id for face in CapturedFace.query.filter_by(name='alice').order_by(
+        CapturedFace.capture_date.desc(), CapturedFace.id.desc())]
+    ids, _, older_url = pages('/?person_filter=ali')
+    assert ids == alices[:FACES_PER_PAGE]
+    assert 'person_filter=ali' in older_url
+    ids, newer_url, older_url = pages(older_url)
+    assert ids == alices[FACES_PER_PAGE:2 * FACES_PER_PAGE]
+    assert 'person_filter=ali' in newer_url and older_url is None
+
+
+def test_invalid_cursor_shows_the_first_page(faces, pages):
+    ids, newer_url, _ = pages('/?after=garbage')
+    assert ids == faces[:FACES_PER_PAGE] and newer_url is None
+
+
+def cursor_of(face_id):
+    face = db.session.get(CapturedFace, face_id)
+    return f'{face.capture_date.isoformat()}_{face.id}'
@@ -0,0 +1,124 @@
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.extensions import db
+from app.models import CapturedFace, RecognizedPerson
+from recognition.persistence import CaptureWriter, PersonCache
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    db.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add(RecognizedPerson(id=1, name="alice"))
+    session.commit()
+    session.close()
+    return factory
+
+
+class FlakySession:
+    """Session whose first ``failures`` executes fail as if the database were down."""
+
+    def __init__(self, session, failures):
+        self.session = session
+        self.failures = failures
+
+    def execute(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError("INSERT", {}, Exception("server closed the connection"))
+        return self.session.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+def row(name="alice", person_id=1):
+    return dict(name=name, capture_date=datetime(2026, 10, 18, 9, 30), image_format="JPEG",
+                confidence=0.9, recognized_person_id=person_id, image_data=b"\xff\xd8jpeg")
+
+
+def make_writer(session_factory, tmp_path, failures=0):
+    return CaptureWriter(lambda: FlakySession(session_factory(), failures), flush_interval=0.01,
+                         journal_path=str(tmp_path / "faces.journal"), max_retries=2, retry_backoff=0)
+
+
+def saved(session_factory):
+    session = session_factory()
+    try:
+        return session.query(CapturedFace).count()
+    finally:
+        session.close()
+
+
+def run(writer, rows):
+    writer.start()
+    for r in rows:
+        assert writer.submit(r)
+    writer.stop()
+
+
+def test_transient_errors_are_retried(session_factory, tmp_path):
+    writer = make_writer(session_factory, tmp_path, failures=2)
+    run(writer, [row(), row()])
+    assert saved(session_factory) == 2
+    assert writer.flushed == 2 and writer.journaled == 0
+    assert not os.path.exists(writer.journal_path)
+
+
+def test_journal_is_replayed_once_the_database_is_back(session_factory, tmp_path):
+    down = make_writer(session_factory, tmp_path, failures=100)
+    run(down, [row(), row("Unknown", None)])
+    assert down.journaled == 2 and saved(session_factory) == 0
+    assert os.path.exists(down.journal_path)
+
+    up = make_writer(session_factory, tmp_path)
+    run(up, [row()])
+    assert saved(session_factory) == 3
+    assert up.flushed == 3
+    assert not os.path.exists(up.journal_path)
+    session = session_factory()
+    assert {bytes(face.image_data) for face in session.query(CapturedFace)} == {b"\xff\xd8jpeg"}
+    session.close()
+
+
+def test_rejected_row_does_not_lose_the_batch(session_factory, tmp_path):
+    writer = make_writer(session_factory, tmp_path)
+    run(writer, [row(), row("bob", 99), row()])  # No person 99: a foreign key violation
+    assert saved(session_factory) == 2
+    assert writer.rejected == 1 and writer.journaled == 0
+    with open(writer.rejected_path) as f:
+        assert '"bob"' in f.read()
+
+
+def test_ids_of_deleted_people_are_resolved_by_name(session_factory, tmp_path):
+    cache = PersonCache(session_factory)
+    cache.refresh()
+    writer = make_writer(session_factory, tmp_path)
+    writer.person_cache = cache
+    run(writer, [row("alice", 99), row("ghost", 98)])  # Gallery ids of people since deleted
+    assert writer.rejected == 0
+    session = session_factory()
+    ids = {face.name: face.recognized_person_id for face in session.query(CapturedFace)}
+    session.close()
+    assert ids == {"alice": 1, "ghost": None}
+
+
+def test_full_queue_spills_to_the_journal(session_factory, tmp_path):
+    writer = CaptureWriter(session_factory, flush_interval=0.01, max_queue=1, submit_timeout=0.01,
+                           journal_path=str(tmp_path / "faces.journal"))
+    assert writer.submit(row()) and writer.submit(row())
+    assert writer.depth == 1 and writer.journaled == 1 and writer.dropped == 0
+    writer.start()
+    writer.stop()
+    assert saved(session_factory) == 2
+    assert not os.path.exists(writer.journal_path)
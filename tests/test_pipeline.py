@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from recognition.pipeline import RoundRobinQueue
+
+
+def job(camera, seq):
+    return SimpleNamespace(camera=camera, seq=seq)
+
+
+def test_cameras_are_served_in_turn():
+    q = RoundRobinQueue(3)
+    for seq in range(3):
+        q.put(job("busy", seq))
+    q.put(job("quiet", 0))
+    order = [(item.camera, item.seq) for item in (q.get_nowait() for _ in range(4))]
+    assert order == [("busy", 0), ("quiet", 0), ("busy", 1), ("busy", 2)]
+    assert q.empty()
+
+
+def test_busy_camera_only_drops_its_own_frames():
+    q = RoundRobinQueue(2)
+    q.put(job("quiet", 0))
+    for seq in range(5):
+        q.put(job("busy", seq))
+    assert q.dropped == 3
+    assert q.qsize() == 3
+    items = [q.get_nowait() for _ in range(3)]
+    assert [(item.camera, item.seq) for item in items] == [("quiet", 0), ("busy", 3), ("busy", 4)]
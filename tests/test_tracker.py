@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from recognition.monitor import Recognizer
+from recognition.pipeline import FrameJob
+from recognition.tracker import FaceTracker
+
+BOX = (10, 60, 60, 10)
+OTHER_BOX = (100, 160, 160, 100)
+
+
+def detect(tracker, seq, boxes=(BOX,)):
+    return [track for track, _ in tracker.update(seq, list(boxes))]
+
+
+def test_known_face_saved_once_per_visit():
+    tracker = FaceTracker()
+    track, = detect(tracker, 1)
+    tracker.assign(track, 1, "alice", 0.9, 7)
+    assert tracker.claim_save(track, 1)
+    tracker.mark_saved(track, "alice")
+    for seq in range(2, 6):
+        assert detect(tracker, seq) == [track]
+        assert not tracker.claim_save(track, seq)
+
+
+def test_unknown_face_waits_for_a_match():
+    tracker = FaceTracker(unknown_save_frames=3)
+    track, = detect(tracker, 1)
+    tracker.assign(track, 1, "Unknown", 0.0)
+    assert not tracker.claim_save(track, 1)
+    detect(tracker, 2)
+    assert not tracker.claim_save(track, 2)
+    detect(tracker, 3)
+    assert tracker.claim_save(track, 3)
+
+
+def test_unknown_visit_saved_again_when_recognized():
+    tracker = FaceTracker(unknown_save_frames=1)
+    track, = detect(tracker, 1)
+    tracker.assign(track, 1, "Unknown", 0.0)
+    assert tracker.claim_save(track, 1)
+    tracker.mark_saved(track, "Unknown")
+    detect(tracker, 2)
+    assert not tracker.claim_save(track, 2)
+
+    tracker.assign(track, 2, "alice", 0.9, 7)
+    assert tracker.claim_save(track, 2)
+    tracker.mark_saved(track, "alice")
+    detect(tracker, 3)
+    assert not tracker.claim_save(track, 3)
+
+
+def test_different_person_is_a_new_visit():
+    tracker = FaceTracker()
+    track, = detect(tracker, 1)
+    tracker.assign(track, 1, "alice", 0.9, 7)
+    tracker.claim_save(track, 1)
+    tracker.mark_saved(track, "alice")
+    tracker.assign(track, 2, "bob", 0.9, 8)
+    assert tracker.claim_save(track, 2)
+
+
+def test_released_save_is_claimed_again():
+    tracker = FaceTracker()
+    track, = detect(tracker, 1)
+    tracker.assign(track, 1, "alice", 0.9, 7)
+    assert tracker.claim_save(track, 1)
+    assert not tracker.claim_save(track, 2)  # Pending
+    tracker.release_save(track)
+    assert tracker.claim_save(track, 3)
+
+
+def test_lost_save_claim_expires():
+    tracker = FaceTracker(max_age=5)
+    track, = detect(tracker, 1)
+    tracker.assign(track, 1, "alice", 0.9, 7)
+    assert tracker.claim_save(track, 1)
+    assert not tracker.claim_save(track, 6)
+    assert tracker.claim_save(track, 7)
+
+
+def test_late_frame_is_tracked_without_moving_tracks():
+    tracker = FaceTracker()
+    track, = detect(tracker, 5)
+    tracker.assign(track, 5, "alice", 0.9, 7)
+    assert tracker.claim_save(track, 5)
+    tracker.mark_saved(track, "alice")
+    tracker.update(6, [])  # An empty frame finishing first
+    late, untracked = detect(tracker, 4, [(12, 62, 62, 12), OTHER_BOX])
+    assert late is track and untracked is None
+    assert track.box == BOX and track.last_seen == 5
+    assert tracker.tracks == [track] and tracker.last_seq == 6
+    assert not tracker.claim_save(late, 4)  # No second save of the visit
+
+
+def test_late_frame_matches_where_the_track_was():
+    tracker = FaceTracker()
+    boxes = [(10 + 10 * i, 60 + 10 * i, 60 + 10 * i, 10 + 10 * i) for i in range(5)]
+    for seq, box in enumerate(boxes, 1):
+        track, = detect(tracker, seq, [box])
+    tracker.assign(track, 5, "alice", 0.9, 7)
+    tracker.claim_save(track, 5)
+    tracker.mark_saved(track, "alice")
+    # Frame 1 finishing last: its box no longer overlaps the track, which has moved on
+    late, = detect(tracker, 1, [boxes[0]])
+    assert late is track and track.box == boxes[-1]
+    assert len(tracker.tracks) == 1
+    assert not tracker.claim_save(late, 1)
+
+
+def test_late_identity_does_not_replace_newer_one():
+    tracker = FaceTracker()
+    track, = detect(tracker, 5)
+    tracker.assign(track, 5, "alice", 0.9, 7)
+    tracker.assign(track, 4, "Unknown", 0.0)
+    assert track.name == "alice" and track.encoded_at == 5
+
+
+class FakeWriter:
+    def __init__(self, accept):
+        self.accept = accept
+        self.rows = []
+
+    def submit(self, row):
+        if self.accept:
+            self.rows.append(row)
+        return self.accept
+
+
+def save_frame(tracker, writer, seq):
+    track, = detect(tracker, seq)
+    tracker.assign(track, seq, "alice", 0.9, 7)
+    camera = SimpleNamespace(id=0, tracker=tracker, last_capture_time=0)
+    job = FrameJob(seq=seq, frame=np.zeros((100, 100, 3), np.uint8), camera=camera,
+                   boxes=[BOX], names=["alice"], confidences=[0.9], person_ids=[7],
+                   tracks=[track], motion_detected=True)
+    job.save_indices = [i for i, t in enumerate(job.tracks) if tracker.claim_save(t, seq)]
+    Recognizer(None, None, writer).save(job)
+    return track
+
+
+def test_track_saved_only_once_queued():
+    tracker = FaceTracker()
+    track = save_frame(tracker, FakeWriter(accept=False), 1)
+    assert track.saved_name is None and track.save_pending is None
+
+    writer = FakeWriter(accept=True)
+    save_frame(tracker, writer, 2)
+    assert track.saved_name == "alice"
+    assert len(writer.rows) == 1
+    save_frame(tracker, writer, 3)
+    assert len(writer.rows) == 1
@@ -1,49 +1,154 @@
 # import the necessary packages
 from imutils import paths
-import face_recognition
-#import argparse
-import pickle
-import cv2
+import numpy as np
+import argparse
 import os
+from recognition import compact_gallery, evaluate_compaction, TrainingManifest, encode_images
+from recognition import Gallery, GalleryError, load_gallery
+from recognition.persistence import PersonCache
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
-# our images are located in the dataset folder
-print("[INFO] start processing faces...")
-imagePaths = list(paths.list_images("dataset"))
-
-# initialize the list of known encodings and known names
-knownEncodings = []
-knownNames = []
-
-# loop over the image paths
-for (i, imagePath) in enumerate(imagePaths):
-	# extract the person name from the image path
-	print("[INFO] processing image {}/{}".format(i + 1,
-		len(imagePaths)))
-	name = imagePath.split(os.path.sep)[-2]
-
-	# load the input image and convert it from RGB (OpenCV ordering)
-	# to dlib ordering (RGB)
-	image = cv2.imread(imagePath)
-	rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-	# detect the (x, y)-coordinates of the bounding boxes
-	# corresponding to each face in the input image
-	boxes = face_recognition.face_locations(rgb,
-		model="hog")
-
-	# compute the facial embedding for the face
-	encodings = face_recognition.face_encodings(rgb, boxes)
-
-	# loop over the encodings
-	for encoding in encodings:
-		# add each encoding + name to our set of known names and
-		# encodings
-		knownEncodings.append(encoding)
-		knownNames.append(name)
-
-# dump the facial encodings + names to disk
-print("[INFO] serializing encodings...")
-data = {"encodings": knownEncodings, "names": knownNames}
-f = open("encodings.pickle", "wb")
-f.write(pickle.dumps(data))
-f.close()
+ENCODINGS_FILE = "encodings.gallery"
+MANIFEST_FILE = "encodings.manifest.json"
+
+
+def main():
+	# construct the argument parser and parse the arguments
+	ap = argparse.ArgumentParser()
+	ap.add_argument("--incremental", action="store_true",
+		help="only encode new or changed images and merge them into the existing gallery")
+	ap.add_argument("--workers", type=int, default=os.cpu_count(),
+		help="number of encoding processes (default: one per CPU core)")
+	ap.add_argument("--chunk-size", type=int, default=8,
+		help="images handed to a worker process at a time")
+	ap.add_argument("--detector", default="hog",
+		help="face detector backend: hog, cnn, haar, dnn or haar+hog")
+	ap.add_argument("--detector-scale", type=float, default=1.0,
+		help="resize factor applied to images before detection")
+	ap.add_argument("--database", default=os.environ.get("DATABASE_URL"),
+		help="database URI used to store each person's id in the gallery "
+		"(default: $DATABASE_URL)")
+	ap.add_argument("--compact", action="store_true",
+		help="also store per-person prototypes for faster matching")
+	ap.add_argument("--max-medoids", type=int, default=3,
+		help="outlier medoids kept per person in addition to the centroid")
+	ap.add_argument("--threshold", type=float, default=0.45,
+		help="match threshold used to report the accuracy of the compacted gallery")
+	args = vars(ap.parse_args())
+
+	# our images are located in the dataset folder
+	print("[INFO] start processing faces...")
+	imagePaths = list(paths.list_images("dataset"))
+
+	# initialize the list of known encodings, names and source image paths
+	knownEncodings = []
+	knownNames = []
+	knownPaths = []
+	manifest = TrainingManifest()
+
+	# the previous gallery, if any, carries the generation number that
+	# running monitors compare against
+	existing = None
+	if os.path.exists(ENCODINGS_FILE):
+		try:
+			existing = load_gallery(ENCODINGS_FILE)
+		except GalleryError as e:
+			print("[WARNING] ignoring previous gallery: {}".format(e))
+
+	# in incremental mode, keep the encodings of images that are unchanged
+	# since the last run and only encode the new or modified ones
+	if args["incremental"]:
+		if existing is None or not os.path.exists(MANIFEST_FILE):
+			print("[INFO] no previous incremental gallery, encoding everything")
+		else:
+			manifest = TrainingManifest.load(MANIFEST_FILE)
+			unchanged, changed = manifest.diff(imagePaths)
+			removed = manifest.prune(imagePaths)
+			# an image with faces but no rows in the gallery (e.g. one written
+			# by flask export-gallery, whose paths are not dataset paths) is
+			# encoded again rather than silently dropped
+			inGallery = set(existing.paths)
+			missing = [path for path in unchanged
+				if manifest.entries[path].get("faces") and path not in inGallery]
+			if missing:
+				print("[WARNING] {} unchanged images have no encodings in {}, re-encoding them".format(
+					len(missing), ENCODINGS_FILE))
+				missingSet = set(missing)
+				unchanged = [path for path in unchanged if path not in missingSet]
+				changed = changed + missing
+			keep = set(unchanged)
+			rows = [i for (i, path) in enumerate(existing.paths) if path in keep]
+			if rows:
+				knownEncodings.append(np.array(existing.encodings[rows]))
+			knownNames.extend(existing.names[i] for i in rows)
+			knownPaths.extend(existing.paths[i] for i in rows)
+			print("[INFO] {} unchanged, {} new or changed, {} removed images".format(
+				len(unchanged), len(changed), len(removed)))
+			imagePaths = changed
+
+	# detect and encode the faces of every image on a pool of worker
+	# processes; each result is a (faces x 128) float32 array
+	print("[INFO] encoding {} images with {} workers...".format(
+		len(imagePaths), args["workers"]))
+	for (imagePath, name, encodings) in encode_images(imagePaths,
+		workers=args["workers"], chunk_size=args["chunk_size"],
+		detector=args["detector"],
+		detector_options={"scale": args["detector_scale"]}):
+		if len(encodings):
+			knownEncodings.append(encodings)
+			knownNames.extend([name] * len(encodings))
+			knownPaths.extend([imagePath] * len(encodings))
+		manifest.record(imagePath, len(encodings))
+
+	# dump the facial encodings + names to disk
+	print("[INFO] serializing encodings...")
+	if knownEncodings:
+		knownEncodings = np.vstack(knownEncodings)
+	else:
+		knownEncodings = np.zeros((0, 128), dtype=np.float32)
+	# store the RecognizedPerson id of every encoding so the monitor never
+	# has to look people up by name
+	personIds = None
+	if args["database"]:
+		cache = PersonCache(sessionmaker(bind=create_engine(args["database"])))
+		try:
+			cache.refresh()
+			personIds = [cache.get(name) for name in knownNames]
+			personIds = [-1 if pid is None else pid for pid in personIds]
+			print("[INFO] resolved person ids for {}/{} people".format(
+				len(set(n for (n, pid) in zip(knownNames, personIds) if pid >= 0)),
+				len(set(knownNames))))
+		except Exception as e:
+			print("[WARNING] could not resolve person ids: {}".format(e))
+	gallery = Gallery(knownEncodings, knownNames, person_ids=personIds, paths=knownPaths,
+		generation=existing.generation if existing else 0)
+
+	# optionally reduce every person to a few prototypes, keeping the full
+	# encodings for refinement of matches close to the threshold
+	if args["compact"] and len(knownEncodings):
+		print("[INFO] compacting gallery...")
+		compact = compact_gallery(knownEncodings, knownNames,
+			max_medoids=args["max_medoids"])
+		gallery.prototypes = compact["prototypes"]
+		gallery.prototype_names = compact["prototype_names"]
+		gallery.radii = compact["radii"]
+		print("[INFO] {} encodings -> {} prototypes".format(
+			len(knownEncodings), len(gallery.prototypes)))
+		report = evaluate_compaction(knownEncodings, knownNames,
+			args["threshold"], max_medoids=args["max_medoids"])
+		if report:
+			print("[INFO] held-out accuracy: full {:.3f}, compact {:.3f} "
+				"(delta {:+.3f}, {:.1%} refined)".format(
+				report["exact_accuracy"], report["compact_accuracy"],
+				report["accuracy_delta"], report["refine_rate"]))
+
+	# the gallery is written atomically, so readers never see a partial file
+	gallery.save(ENCODINGS_FILE)
+	manifest.save(MANIFEST_FILE)
+
+
+# worker processes may re-import this module (spawn start method), so only
+# train when run as a script
+if __name__ == "__main__":
+	main()